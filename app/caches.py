@@ -0,0 +1,34 @@
+"""Caches for serialized resources.
+"""
+
+import typing
+
+from app import utils
+from app.models import Quote
+from app.utils.cache import ReadThroughCache
+
+
+async def _load_quote(quote_id: int) -> typing.Union[dict, None]:
+  """Load a serialized quote from the database.
+  """
+
+  quote = await Quote.get_or_none(pk=quote_id)
+  return quote.to_dict() if quote else None
+
+
+async def _load_quotes(quote_ids: typing.List[int]) -> typing.Dict[int, dict]:
+  """Load many serialized quotes from the database in one query.
+  """
+
+  quotes = await Quote.filter(id__in=quote_ids)
+  return {quote.id: quote.to_dict() for quote in quotes}
+
+
+# Quotes are read far more often than they change.
+quote_cache = ReadThroughCache(
+  "quote",
+  loader=_load_quote,
+  many_loader=_load_quotes,
+  ttl=utils.config("QUOTE_CACHE_TTL", cast=int, default=300),
+  local_ttl=utils.config("QUOTE_LOCAL_CACHE_TTL", cast=float, default=5),
+)
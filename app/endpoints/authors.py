@@ -1,30 +1,39 @@
 """Author related endpoints.
 """
 
-import typing
 from starlette.requests import Request
-from starlette.responses import JSONResponse
 
-from app.utils.decorators import use_user, use_path_model, restrict
+from app.utils.responses import ORJSONResponse
+from app.utils.decorators import (
+  use_user,
+  use_path_model,
+  use_page,
+  use_counts,
+  use_etag,
+  restrict,
+)
+from app.utils.pagination import Page
 from app.utils.restrictions import author_is_self
 from app.models import Author, Meaning, Quote
 
 
 @use_path_model(Author, path_key="username")
+@use_counts("author")
+@use_etag("author", "user_id", "username", "picture", "quote_count")
 async def get_author(
   _request: Request,
   author: Author,
   *_args,
   **_kwargs,
-) -> JSONResponse:
+) -> ORJSONResponse:
   """Get an author profile.
   """
 
-  return JSONResponse(
+  return ORJSONResponse(
     {
       "message": "Success.",
       "result": {
-        "author": await author.to_dict(),
+        "author": author.to_dict(),
       },
     },
     status_code=200,
@@ -32,44 +41,24 @@ async def get_author(
 
 
 @use_path_model(Author, path_key="username")
+@use_page
 async def get_quotes_from_author(
-  request: Request,
+  _request: Request,
   author: Author,
+  page: Page,
   *_args,
   **_kwargs,
-) -> JSONResponse:
+) -> ORJSONResponse:
   """Get quotes from an author.
   """
 
-  offset = int(request.query_params.get("offset", default=0))
-  count = int(request.query_params.get("count", default=10))
-
-  if offset < 0:
-    return JSONResponse(
-      {
-        "message": "Query parameter 'offset' must be greater than " \
-                   "or equal to 0.",
-      },
-      status_code=400,
-    )
-
-  if count < 1:
-    return JSONResponse(
-      {
-        "message": "Query parameter 'count' must be greater than 1.",
-      },
-      status_code=400,
-    )
-
-  quotes: typing.Iterable[Quote] = await Quote \
-    .filter(author=author.user_id) \
-    .offset(offset) \
-    .limit(count)
+  quotes, next_cursor = await page.fetch(Quote.filter(author=author.user_id))
 
-  return JSONResponse(
+  return ORJSONResponse(
     {
       "message": "Success.",
-      "result": [await quote.to_dict() for quote in quotes],
+      "result": [quote.to_dict() for quote in quotes],
+      "next": next_cursor,
     },
     status_code=200,
   )
@@ -79,44 +68,25 @@ async def get_quotes_from_author(
 @use_user
 @use_path_model(Author, path_key="username")
 @restrict(author_is_self, assertion=True)
+@use_page
 async def get_meanings_from_author(
-  request: Request,
+  _request: Request,
   author: Author,
+  page: Page,
   *_args,
   **_kwargs,
-) -> JSONResponse:
+) -> ORJSONResponse:
   """Get all meanings from an author.
   """
 
-  offset = int(request.query_params.get("offset", default=0))
-  count = int(request.query_params.get("count", default=10))
-
-  if offset < 0:
-    return JSONResponse(
-      {
-        "message": "Query parameter 'offset' must be greater than " \
-                   "or equal to 0.",
-      },
-      status_code=400,
-    )
-
-  if count < 1:
-    return JSONResponse(
-      {
-        "message": "Query parameter 'count' must be greater than 1.",
-      },
-      status_code=400,
-    )
-
-  meanings: typing.Iterable[Meaning] = await Meaning \
-    .filter(author=author.user_id) \
-    .offset(offset) \
-    .limit(count)
+  meanings, next_cursor = await page.fetch(
+    Meaning.filter(author=author.user_id))
 
-  return JSONResponse(
+  return ORJSONResponse(
     {
       "message": "Success.",
-      "result": [await meaning.to_dict() for meaning in meanings],
+      "result": [meaning.to_dict() for meaning in meanings],
+      "next": next_cursor,
     },
     status_code=200,
   )
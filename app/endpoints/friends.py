@@ -0,0 +1,197 @@
+"""Friendship related endpoints.
+"""
+
+import typing
+
+from starlette.requests import Request
+from tortoise.query_utils import Q
+
+from app.utils.responses import ORJSONResponse
+from app.utils.decorators import (
+  restrict,
+  use_user,
+  use_friends,
+  use_path_model,
+)
+from app.utils.restrictions import author_is_self
+from app.utils.friends import add_friends, remove_friends
+from app.utils import auth
+from app.models import Author, Friendship
+
+# Largest number of pending friend requests to show.
+_MAX_REQUEST_COUNT = 100
+
+
+# GET ALL
+@use_user
+@use_friends
+async def get_friends(
+  _request: Request,
+  friends: typing.Set[str],
+  *_args,
+  **_kwargs,
+) -> ORJSONResponse:
+  """Get the profiles of every friend of the user.
+  """
+
+  authors = await auth.get_users(friends)
+
+  return ORJSONResponse(
+    {
+      "message": "Success.",
+      "result": [author.to_dict() for author in authors.values()],
+    },
+    status_code=200,
+  )
+
+
+@use_user
+async def get_friend_requests(
+  _request: Request,
+  user: Author,
+  *_args,
+  **_kwargs,
+) -> ORJSONResponse:
+  """Get the pending friend requests sent to the user.
+  """
+
+  friendships = await Friendship \
+    .filter(addressee=user.user_id, accepted=False) \
+    .limit(_MAX_REQUEST_COUNT)
+  authors = await auth.get_users(
+    friendship.requester for friendship in friendships)
+
+  return ORJSONResponse(
+    {
+      "message":
+        "Success.",
+      "result": [{
+        **friendship.to_dict(),
+        "requester":
+          authors[friendship.requester].to_dict(),
+      } for friendship in friendships if friendship.requester in authors],
+    },
+    status_code=200,
+  )
+
+
+# CREATE
+@use_user
+@use_path_model(Author, path_key="username")
+@restrict(author_is_self, assertion=False)
+async def request_friendship(
+  _request: Request,
+  user: Author,
+  author: Author,
+  *_args,
+  **_kwargs,
+) -> ORJSONResponse:
+  """Send a friend request to an author.
+
+  Sending a request to an author who already sent one accepts theirs.
+  """
+
+  # Accept the request the author already sent, if any.
+  friendship = None
+  accepted = await Friendship.accept(author.user_id, user.user_id)
+  if not accepted:
+    friendship = await Friendship.create_once(
+      requester=user.user_id,
+      addressee=author.user_id,
+    )
+    # A request the author sent at the same time may have won the insert.
+    if not friendship:
+      accepted = await Friendship.accept(author.user_id, user.user_id)
+
+  if accepted:
+    await add_friends(user.user_id, author.user_id)
+    return ORJSONResponse(
+      {
+        "message": "Success.",
+      },
+      status_code=200,
+    )
+
+  if not friendship:
+    return ORJSONResponse(
+      {
+        "message": "You have already sent a request to or are friends with "
+                   "this Author.",
+      },
+      status_code=403,
+    )
+
+  return ORJSONResponse(
+    {
+      "message": "Success.",
+      "result": friendship.to_dict(),
+    },
+    status_code=201,
+  )
+
+
+@use_user
+@use_path_model(Author, path_key="username")
+async def accept_friendship(
+  _request: Request,
+  user: Author,
+  author: Author,
+  *_args,
+  **_kwargs,
+) -> ORJSONResponse:
+  """Accept a friend request from an author.
+  """
+
+  if not await Friendship.accept(author.user_id, user.user_id):
+    return ORJSONResponse(
+      {
+        "message": "Not found.",
+      },
+      status_code=404,
+    )
+
+  await add_friends(user.user_id, author.user_id)
+
+  return ORJSONResponse(
+    {
+      "message": "Success.",
+    },
+    status_code=200,
+  )
+
+
+# DELETE
+@use_user
+@use_path_model(Author, path_key="username")
+async def remove_friendship(
+  _request: Request,
+  user: Author,
+  author: Author,
+  *_args,
+  **_kwargs,
+) -> ORJSONResponse:
+  """Remove a friend, or cancel or decline a friend request.
+  """
+
+  deleted = await Friendship \
+    .filter(
+      Q(requester=user.user_id, addressee=author.user_id) |
+      Q(requester=author.user_id, addressee=user.user_id)) \
+    .delete()
+
+  if not deleted:
+    return ORJSONResponse(
+      {
+        "message": "Not found.",
+      },
+      status_code=404,
+    )
+
+  await remove_friends(user.user_id, author.user_id)
+
+  return ORJSONResponse(
+    {
+      "message": "Success.",
+    },
+    status_code=200,
+  )
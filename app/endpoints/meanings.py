@@ -2,42 +2,84 @@
 """
 
 from starlette.requests import Request
-from starlette.responses import JSONResponse
 
+from app.utils.responses import ORJSONResponse
 from app.utils.decorators import (
+  rate_limit,
   restrict,
   validate_body,
   use_user,
   use_path_model,
+  use_page,
+  use_etag,
+)
+from app.utils.restrictions import (
+  author_of_meaning,
+  author_of_quote,
+  friend_of_author,
 )
-from app.utils.restrictions import author_of_meaning, author_of_quote
 from app.schemas import MeaningSchema
+from app.utils.pagination import Page
 from app.models import Author, Meaning, Quote
+from app.caches import quote_cache
+from app.utils import config
+
+# Number of meanings a user may create per minute.
+_CREATE_RATE_LIMIT = config("MEANING_CREATE_RATE_LIMIT", cast=int, default=20)
 
 
 # GET ONE
 @use_user
 @use_path_model(Meaning, path_key="meaning_id")
-@restrict(author_of_meaning, author_of_quote, assertion=True)
+@restrict(author_of_meaning, author_of_quote, friend_of_author, assertion=True)
+@use_etag("meaning", "id", "author", "published")
 async def get_meaning(
   _request: Request,
   meaning: Meaning,
   *_args,
   **_kwargs,
-) -> JSONResponse:
+) -> ORJSONResponse:
   """Get a specific Meaning.
   """
 
-  return JSONResponse(
+  return ORJSONResponse(
+    {
+      "message": "Success.",
+      "result": meaning.to_dict(),
+    },
+    status_code=200,
+  )
+
+
+# GET ALL
+@use_user
+@use_path_model(Quote, path_key="quote_id")
+@restrict(author_of_quote, assertion=True)
+@use_page
+async def get_meanings_of_quote(
+  _request: Request,
+  quote: Quote,
+  page: Page,
+  *_args,
+  **_kwargs,
+) -> ORJSONResponse:
+  """Get all meanings of a Quote, for its author.
+  """
+
+  meanings, next_cursor = await page.fetch(Meaning.filter(quote_id=quote.id))
+
+  return ORJSONResponse(
     {
       "message": "Success.",
-      "result": await meaning.to_dict(),
+      "result": [meaning.to_dict() for meaning in meanings],
+      "next": next_cursor,
     },
     status_code=200,
   )
 
 
 # CREATE
+@rate_limit("create_meaning", limit=_CREATE_RATE_LIMIT, period=60)
 @validate_body(MeaningSchema)
 @use_user
 @use_path_model(Quote, path_key="quote_id")
@@ -49,33 +91,30 @@ async def create_meaning(
   data: MeaningSchema,
   *_args,
   **_kwargs,
-) -> JSONResponse:
+) -> ORJSONResponse:
   """Endpoint to create a new Meaning.
   """
 
-  meaning = await Meaning.get_or_none(
+  meaning = await Meaning.create_once(
     author=user.user_id,
-    quote=quote,
+    body=data.body,
+    quote_id=quote.id,
   )
 
-  if meaning:
-    return JSONResponse(
+  if not meaning:
+    return ORJSONResponse(
       {
         "message": "You have already submitted a Meaning for this Quote.",
       },
       status_code=403,
     )
 
-  meaning = await Meaning.create(
-    author=user.user_id,
-    body=data.body,
-    quote=quote,
-  )
+  await quote_cache.invalidate(quote.id)
 
-  return JSONResponse(
+  return ORJSONResponse(
     {
       "message": "Success.",
-      "result": await meaning.to_dict(),
+      "result": meaning.to_dict(),
     },
     status_code=201,
   )
@@ -90,14 +129,14 @@ async def disown_meaning(
   meaning: Meaning,
   *_args,
   **_kwargs,
-) -> JSONResponse:
+) -> ORJSONResponse:
   """Endpoint to disown a Meaning.
   """
 
   meaning.author = None
   await meaning.save()
 
-  return JSONResponse(
+  return ORJSONResponse(
     {
       "message": "Success.",
     },
@@ -0,0 +1,51 @@
+"""Metrics related endpoints.
+"""
+
+import hmac
+
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+from app.utils import config
+from app.utils.metrics import Metrics, render_stats
+from app.utils.responses import ORJSONResponse
+from app.utils.auth import token_cache
+from app.utils.http import HTTP
+from app.caches import quote_cache
+
+# Bearer token Prometheus scrapes metrics with. Metrics aren't served without.
+_SCRAPE_TOKEN = config("METRICS_SCRAPE_TOKEN", default=None)
+
+
+async def get_metrics(request: Request) -> PlainTextResponse:
+  """Get metrics in the Prometheus text format.
+
+  Metrics reveal how the app performs, so only scrapers holding the scrape
+  token get them.
+  """
+
+  if not _SCRAPE_TOKEN:
+    return ORJSONResponse(
+      {
+        "message": "Not found.",
+      },
+      status_code=404,
+    )
+
+  header = request.headers.get("Authorization", "")
+  if not hmac.compare_digest(
+      header.encode("utf-8"), f"Bearer {_SCRAPE_TOKEN}".encode("utf-8")):
+    return ORJSONResponse(
+      {
+        "message": "Invalid metrics scrape token.",
+      },
+      status_code=401,
+    )
+
+  return PlainTextResponse(
+    Metrics().render() + render_stats("token_cache", token_cache.stats()) +
+    render_stats("quote_cache", quote_cache.local.stats()) +
+    render_stats("http_pool",
+                 HTTP().stats()),
+    media_type="text/plain; version=0.0.4",
+  )
@@ -0,0 +1,138 @@
+"""Quote of the Day related endpoints.
+"""
+
+from starlette.requests import Request
+
+from app.utils.responses import ORJSONResponse
+from app.utils.decorators import (
+  restrict,
+  use_user,
+  use_path_model,
+)
+from app.utils.restrictions import author_of_quote
+from app.utils import qotd
+from app.models import Author, Quote, QuoteOfTheDay
+from app.caches import quote_cache
+from app.utils import config
+
+# Number of submissions to show, most voted first.
+_STANDINGS_COUNT = config("QOTD_STANDINGS_COUNT", cast=int, default=50)
+
+
+async def get_quote_of_the_day(_request: Request) -> ORJSONResponse:
+  """Get the latest Quote of the Day.
+  """
+
+  winner = await QuoteOfTheDay.first()
+  quote = await quote_cache.get(winner.quote_id) if winner else None
+
+  if not quote:
+    return ORJSONResponse(
+      {
+        "message": "Not found.",
+      },
+      status_code=404,
+    )
+
+  return ORJSONResponse(
+    {
+      "message": "Success.",
+      "result": {
+        **winner.to_dict(),
+        "quote": quote,
+      },
+    },
+    status_code=200,
+  )
+
+
+async def get_submissions(_request: Request) -> ORJSONResponse:
+  """Get the submissions of today with their votes, most voted first.
+  """
+
+  standings = await qotd.standings(count=_STANDINGS_COUNT)
+  quotes = await quote_cache.get_many(quote_id for quote_id, _ in standings)
+
+  return ORJSONResponse(
+    {
+      "message":
+        "Success.",
+      "result": [{
+        "quote": quotes[quote_id],
+        "votes": votes,
+      } for quote_id, votes in standings if quote_id in quotes],
+    },
+    status_code=200,
+  )
+
+
+# CREATE
+@use_user
+@use_path_model(Quote, path_key="quote_id")
+@restrict(author_of_quote, assertion=True)
+async def submit_quote(
+  _request: Request,
+  quote: Quote,
+  *_args,
+  **_kwargs,
+) -> ORJSONResponse:
+  """Submit a quote of your own for today.
+  """
+
+  if not await qotd.submit(quote.id):
+    return ORJSONResponse(
+      {
+        "message": "This Quote has already been submitted today.",
+      },
+      status_code=403,
+    )
+
+  return ORJSONResponse(
+    {
+      "message": "Success.",
+    },
+    status_code=201,
+  )
+
+
+@use_user
+async def vote_for_quote(
+  request: Request,
+  user: Author,
+  *_args,
+  **_kwargs,
+) -> ORJSONResponse:
+  """Vote for a submission of today.
+  """
+
+  try:
+    quote_id = int(request.path_params["quote_id"])
+    votes = await qotd.vote(user.user_id, quote_id)
+  except ValueError:
+    votes = None
+  except qotd.AlreadyVotedError:
+    return ORJSONResponse(
+      {
+        "message": "You have already voted for this Quote today.",
+      },
+      status_code=403,
+    )
+
+  if votes is None:
+    return ORJSONResponse(
+      {
+        "message": "Not found.",
+      },
+      status_code=404,
+    )
+
+  return ORJSONResponse(
+    {
+      "message": "Success.",
+      "result": {
+        "quote": quote_id,
+        "votes": votes,
+      },
+    },
+    status_code=200,
+  )
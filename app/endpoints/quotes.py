@@ -2,39 +2,152 @@
 """
 
 from starlette.requests import Request
-from starlette.responses import JSONResponse
 
+from app.utils.responses import ORJSONResponse
 from app.utils.decorators import (
+  rate_limit,
   validate_body,
   use_path_model,
+  use_cached,
+  use_etag,
   use_user,
+  use_ranked_page,
   restrict,
 )
 from app.utils.restrictions import author_of_quote
 from app.schemas import QuoteSchema
-from app.models import Author, Quote
+from app.utils.pagination import Page, encode_rank_cursor
+from app.models import Author, Quote, SearchTimeoutError
+from app.caches import quote_cache
+from app.utils import config, counters, timeline
 
+# Largest number of quotes a client may ask for at once.
+_MAX_BATCH_COUNT = config("MAX_BATCH_COUNT", cast=int, default=50)
 
-@use_path_model(Quote, path_key="quote_id")
+# Number of quotes a user may create per minute.
+_CREATE_RATE_LIMIT = config("QUOTE_CREATE_RATE_LIMIT", cast=int, default=10)
+
+# Longest search query, in characters.
+_MAX_SEARCH_LENGTH = 200
+
+# Milliseconds a search may take before it is cancelled.
+_SEARCH_TIMEOUT = config("SEARCH_STATEMENT_TIMEOUT", cast=int, default=500)
+
+
+@use_cached(quote_cache, path_key="quote_id")
+@use_etag("quote", "id", "author", "published", "meanings")
 async def get_quote(
   _request: Request,
-  quote: Quote,
+  quote: dict,
   *_args,
   **_kwargs,
-) -> JSONResponse:
+) -> ORJSONResponse:
   """Get a specific Quote.
   """
 
-  return JSONResponse(
+  return ORJSONResponse(
+    {
+      "message": "Success.",
+      "result": quote,
+    },
+    status_code=200,
+  )
+
+
+async def get_quotes(request: Request) -> ORJSONResponse:
+  """Get many specific Quotes at once.
+
+  Results are in the order of the requested IDs, with null for every Quote
+  that doesn't exist.
+  """
+
+  try:
+    quote_ids = [
+      int(quote_id)
+      for quote_id in request.query_params.get("ids", default="").split(",")
+    ]
+  except ValueError:
+    return ORJSONResponse(
+      {
+        "message": "Query parameter 'ids' must be a comma separated list " \
+                   "of integers.",
+      },
+      status_code=400,
+    )
+
+  if len(quote_ids) > _MAX_BATCH_COUNT:
+    return ORJSONResponse(
+      {
+        "message": "Query parameter 'ids' must have at most " \
+                  f"{_MAX_BATCH_COUNT} integers.",
+      },
+      status_code=400,
+    )
+
+  quotes = await quote_cache.get_many(quote_ids)
+
+  return ORJSONResponse(
+    {
+      "message": "Success.",
+      "result": [quotes.get(quote_id) for quote_id in quote_ids],
+    },
+    status_code=200,
+  )
+
+
+@use_ranked_page
+async def search_quotes(
+  request: Request,
+  page: Page,
+  *_args,
+  **_kwargs,
+) -> ORJSONResponse:
+  """Search quotes by their body, best matches first.
+  """
+
+  terms = request.query_params.get("q", "").strip()
+  if not terms or len(terms) > _MAX_SEARCH_LENGTH:
+    return ORJSONResponse(
+      {
+        "message": "Query parameter 'q' must have between 1 and "
+                   f"{_MAX_SEARCH_LENGTH} characters.",
+      },
+      status_code=400,
+    )
+
+  # Fetch one extra match to know whether there is a next page.
+  try:
+    matches = await Quote.search(
+      terms,
+      count=page.count + 1,
+      after=page.after,
+      timeout=_SEARCH_TIMEOUT,
+    )
+  except SearchTimeoutError:
+    return ORJSONResponse(
+      {
+        "message": "Search took too long, try more specific terms.",
+      },
+      status_code=503,
+    )
+
+  next_cursor = None
+  if len(matches) > page.count:
+    last, rank = matches[page.count - 1]
+    next_cursor = encode_rank_cursor(rank, last.id)
+
+  return ORJSONResponse(
     {
       "message": "Success.",
-      "result": await quote.to_dict(),
+      "result": [quote.to_dict() for quote, _ in matches[:page.count]],
+      "next": next_cursor,
     },
     status_code=200,
   )
 
 
 # CREATE
+@rate_limit("create_quote", limit=_CREATE_RATE_LIMIT, period=60)
 @validate_body(QuoteSchema)
 @use_user
 async def create_quote(
@@ -43,7 +156,7 @@ async def create_quote(
   data: dict,
   *_args,
   **_kwargs,
-) -> JSONResponse:
+) -> ORJSONResponse:
   """Endpoint to create a new Quote.
   """
 
@@ -52,10 +165,13 @@ async def create_quote(
     body=data.body,
   )
 
-  return JSONResponse(
+  await counters.count_quote(user.user_id)
+  await timeline.push(quote.id, user.user_id)
+
+  return ORJSONResponse(
     {
       "message": "Success.",
-      "result": await quote.to_dict()
+      "result": quote.to_dict()
     },
     status_code=201,
   )
@@ -69,14 +185,16 @@ async def disown_quote(
   quote: Quote,
   *_args,
   **_kwargs,
-) -> JSONResponse:
+) -> ORJSONResponse:
   """Endpoint to disown a Quote.
   """
 
-  quote.author = None
-  await quote.save()
+  author_id, quote.author = quote.author, None
+  await quote.save(update_fields=["author"])
+  await counters.count_quote(author_id, -1)
+  await quote_cache.invalidate(quote.id)
 
-  return JSONResponse(
+  return ORJSONResponse(
     {
       "message": "Success.",
     },
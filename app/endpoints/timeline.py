@@ -0,0 +1,53 @@
+"""Timeline related endpoints.
+"""
+
+from starlette.requests import Request
+
+from app.utils.responses import ORJSONResponse
+from app.utils.decorators import use_user, use_id_page
+from app.utils.pagination import Page, encode_id_cursor
+from app.utils import timeline
+from app.models import Author
+from app.caches import quote_cache
+
+
+@use_user
+@use_id_page
+async def get_timeline(
+  _request: Request,
+  user: Author,
+  page: Page,
+  *_args,
+  **_kwargs,
+) -> ORJSONResponse:
+  """Get the newest quotes from friends of the user.
+  """
+
+  quote_ids, friend_ids = await timeline.read(
+    user.user_id,
+    page.count,
+    before=page.after,
+  )
+  page_ids = quote_ids[:page.count]
+  quotes = await quote_cache.get_many(page_ids)
+
+  # Skip quotes that were deleted or disowned, or are from former friends.
+  result = [
+    quotes[quote_id]
+    for quote_id in page_ids
+    if quote_id in quotes and quotes[quote_id]["author"] in friend_ids
+  ]
+
+  # Timelines are ordered by quote ID alone, skipped quotes included.
+  next_cursor = None
+  if len(quote_ids) > page.count:
+    next_cursor = encode_id_cursor(page_ids[-1])
+
+  return ORJSONResponse(
+    {
+      "message": "Success.",
+      "result": result,
+      "next": next_cursor,
+    },
+    status_code=200,
+  )
@@ -0,0 +1,6 @@
+-- upgrade --
+CREATE INDEX "idx_quote_author_ed5c0b" ON "quote" ("author", "published", "id");
+CREATE INDEX "idx_meaning_author_874943" ON "meaning" ("author", "published", "id");
+-- downgrade --
+DROP INDEX IF EXISTS "idx_quote_author_ed5c0b";
+DROP INDEX IF EXISTS "idx_meaning_author_874943";
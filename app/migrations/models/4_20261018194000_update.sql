@@ -0,0 +1,5 @@
+-- upgrade --
+UPDATE "meaning" SET "author" = NULL WHERE "id" IN (SELECT "id" FROM (SELECT "id", ROW_NUMBER() OVER (PARTITION BY "author", "quote_id" ORDER BY "published", "id") AS "position" FROM "meaning" WHERE "author" IS NOT NULL) AS "duplicates" WHERE "position" > 1);
+ALTER TABLE "meaning" ADD CONSTRAINT "uid_meaning_author_cf3f9c" UNIQUE ("author", "quote_id");
+-- downgrade --
+ALTER TABLE "meaning" DROP CONSTRAINT IF EXISTS "uid_meaning_author_cf3f9c";
@@ -0,0 +1,18 @@
+-- upgrade --
+CREATE TABLE IF NOT EXISTS "quoteoftheday" (
+    "day" DATE NOT NULL  PRIMARY KEY,
+    "votes" INT NOT NULL,
+    "quote_id" INT NOT NULL REFERENCES "quote" ("id") ON DELETE CASCADE
+);
+COMMENT ON TABLE "quoteoftheday" IS 'Quote of the Day model, the winning submission of a day.';
+CREATE TABLE IF NOT EXISTS "submission" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "day" DATE NOT NULL,
+    "votes" INT NOT NULL  DEFAULT 0,
+    "quote_id" INT NOT NULL REFERENCES "quote" ("id") ON DELETE CASCADE,
+    CONSTRAINT "uid_submission_day_bd3c58" UNIQUE ("day", "quote_id")
+);
+COMMENT ON TABLE "submission" IS 'Quote of the Day submission with its final number of votes.';
+-- downgrade --
+DROP TABLE IF EXISTS "submission";
+DROP TABLE IF EXISTS "quoteoftheday";
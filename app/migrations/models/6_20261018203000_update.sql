@@ -0,0 +1,14 @@
+-- upgrade --
+CREATE TABLE IF NOT EXISTS "friendship" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "requester" VARCHAR(40) NOT NULL,
+    "addressee" VARCHAR(40) NOT NULL,
+    "accepted" BOOL NOT NULL  DEFAULT False,
+    "created" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT "uid_friendship_request_391b21" UNIQUE ("requester", "addressee")
+);
+CREATE INDEX IF NOT EXISTS "idx_friendship_address_4b803a" ON "friendship" ("addressee", "accepted");
+CREATE UNIQUE INDEX IF NOT EXISTS "uid_friendship_pair" ON "friendship" (LEAST("requester", "addressee"), GREATEST("requester", "addressee"));
+COMMENT ON TABLE "friendship" IS 'Friendship model, a friend request until it is accepted.';
+-- downgrade --
+DROP TABLE IF EXISTS "friendship";
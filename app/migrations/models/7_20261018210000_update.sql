@@ -0,0 +1,4 @@
+-- upgrade --
+CREATE INDEX IF NOT EXISTS "idx_quote_body_tsv" ON "quote" USING GIN (to_tsvector('english', "body"));
+-- downgrade --
+DROP INDEX IF EXISTS "idx_quote_body_tsv";
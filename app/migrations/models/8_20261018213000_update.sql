@@ -0,0 +1,5 @@
+-- upgrade --
+ALTER TABLE "quote" ADD "meaning_count" INT NOT NULL  DEFAULT 0;
+UPDATE "quote" SET "meaning_count" = (SELECT COUNT(*) FROM "meaning" WHERE "meaning"."quote_id" = "quote"."id");
+-- downgrade --
+ALTER TABLE "quote" DROP COLUMN "meaning_count";
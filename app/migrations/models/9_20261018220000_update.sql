@@ -0,0 +1,4 @@
+-- upgrade --
+CREATE INDEX "idx_meaning_quote_i_21bb23" ON "meaning" ("quote_id", "published", "id");
+-- downgrade --
+DROP INDEX IF EXISTS "idx_meaning_quote_i_21bb23";
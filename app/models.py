@@ -1,33 +1,95 @@
 """Data models for the API.
 """
 
+import typing
+
+from asyncpg.exceptions import QueryCanceledError
 from tortoise.models import Model
 from tortoise import fields
+from tortoise.transactions import in_transaction
+
+
+class ProfileNotLoadedError(AttributeError):
+  """Error to throw when profile fields are read of an author without them.
+  """
+
+
+class SearchTimeoutError(Exception):
+  """Error to throw when a search is cancelled for taking too long.
+  """
 
 
 class Author:
   """Simple Python model representing an author.
+
+  An author can be built from just a user ID, like the one in token claims, so
+  endpoints that only need the ID cost no lookups. The profile fields are only
+  available on authors got with `auth.get_user` or `auth.get_users`.
   """
 
+  __slots__ = ("user_id", "_username", "_picture", "quote_count")
+
   def __init__(
     self,
     user_id: str,
-    username: str,
-    picture: str,
+    username: str = None,
+    picture: str = None,
+    quote_count: int = None,
   ):
     self.user_id = user_id
-    self.username = username
-    self.picture = picture
+    self._username = username
+    self._picture = picture
+    self.quote_count = quote_count
+
+  @property
+  def loaded(self) -> bool:
+    """Whether the profile fields are available.
+    """
+
+    return self._username is not None
 
-  async def to_dict(self):
+  @property
+  def username(self) -> str:
+    """Username of the author.
+    """
+
+    if not self.loaded:
+      raise ProfileNotLoadedError("username")
+    return self._username
+
+  @property
+  def picture(self) -> str:
+    """Profile picture URL of the author.
+    """
+
+    if not self.loaded:
+      raise ProfileNotLoadedError("picture")
+    return self._picture
+
+  async def load_counts(self) -> "Author":
+    """Load the number of quotes, unless it is already loaded.
+    """
+
+    if self.quote_count is None:
+      # pylint: disable=import-outside-toplevel,cyclic-import
+      from app.utils import counters
+      self.quote_count = await counters.get_quote_count(self.user_id)
+    return self
+
+  def to_dict(self) -> dict:
     """Serialize into dictionary.
+
+    The number of quotes is only included once it is loaded.
     """
 
-    return {
+    data = {
       "user_id": self.user_id,
       "username": self.username,
       "picture": self.picture,
     }
+    if self.quote_count is not None:
+      data["quotes"] = self.quote_count
+    return data
 
 
 class Quote(Model):
@@ -38,9 +100,60 @@ class Quote(Model):
   body = fields.CharField(max_length=140)
   author = fields.CharField(max_length=40, null=True)
   published = fields.DatetimeField(auto_now_add=True)
+  meaning_count = fields.IntField(default=0)
   meanings: fields.ReverseRelation["Meaning"]
 
-  async def to_dict(self):
+  @classmethod
+  async def search(
+    cls,
+    terms: str,
+    count: int,
+    after: typing.Tuple[float, int] = None,
+    timeout: int = 500,
+  ) -> typing.List[typing.Tuple["Quote", float]]:
+    """Find quotes matching search terms, with their rank, best first.
+
+    Matches are found through the full-text index on the body, and ordered by
+    rank and ID so pages can continue after a given rank and ID. The search is
+    cancelled after `timeout` milliseconds.
+    """
+
+    params = [terms]
+    keyset = ""
+    if after:
+      params.extend(after)
+      keyset = 'WHERE ("rank", "id") < ($2, $3) '
+    params.append(count)
+
+    try:
+      async with in_transaction() as connection:
+        await connection.execute_script(
+          f"SET LOCAL statement_timeout = {int(timeout)}")
+        _, rows = await connection.execute_query(
+          'SELECT "id", "body", "author", "published", "meaning_count", '
+          '"rank" FROM ('
+          'SELECT "id", "body", "author", "published", "meaning_count", '
+          'ts_rank(to_tsvector(\'english\', "body"), "query") AS "rank" '
+          'FROM "quote", plainto_tsquery(\'english\', $1) AS "query" '
+          'WHERE to_tsvector(\'english\', "body") @@ "query"'
+          ') AS "matches" '
+          f"{keyset}"
+          'ORDER BY "rank" DESC, "id" DESC '
+          f"LIMIT ${len(params)}",
+          params,
+        )
+    except QueryCanceledError as error:
+      raise SearchTimeoutError from error
+
+    return [(cls._init_from_db(
+      id=row["id"],
+      body=row["body"],
+      author=row["author"],
+      published=row["published"],
+      meaning_count=row["meaning_count"],
+    ), row["rank"]) for row in rows]
+
+  def to_dict(self) -> dict:
     """Serialize into dictionary.
     """
 
@@ -48,7 +161,8 @@ class Quote(Model):
       "id": self.id,
       "body": self.body,
       "author": self.author,
-      "published": self.published.isoformat(),
+      "published": self.published,
+      "meanings": self.meaning_count,
     }
 
   class Meta:
@@ -56,6 +170,7 @@ class Quote(Model):
     """
 
     ordering = ["-published"]
+    indexes = (("author", "published", "id"),)
 
 
 class Meaning(Model):
@@ -67,20 +182,51 @@ class Meaning(Model):
   author = fields.CharField(max_length=40, null=True)
   quote: fields.ForeignKeyRelation[Quote] = fields.ForeignKeyField(
     model_name="models.Quote", related_name="meanings", on_delete="CASCADE")
+  quote_id: int
   published = fields.DatetimeField(auto_now_add=True)
 
-  async def to_dict(self):
-    """Serialize into dictionary.
+  @classmethod
+  async def create_once(
+    cls,
+    author: str,
+    body: str,
+    quote_id: int,
+  ) -> typing.Union["Meaning", None]:
+    """Create a meaning, unless the author already has one for the quote.
+
+    Runs as a single insert that does nothing on conflict, so the check costs
+    no extra query and holds when the same meaning is submitted concurrently.
+    The number of meanings of the quote is incremented in the same statement.
     """
 
-    await self.fetch_related("quote")
+    _, rows = await cls._meta.db.execute_query(
+      'WITH "created" AS ('
+      'INSERT INTO "meaning" ("body", "author", "quote_id") '
+      "VALUES ($1, $2, $3) "
+      'ON CONFLICT ("author", "quote_id") DO NOTHING '
+      'RETURNING "id", "body", "author", "quote_id", "published"'
+      '), "counted" AS ('
+      'UPDATE "quote" SET "meaning_count" = "meaning_count" + 1 '
+      'WHERE "id" = (SELECT "quote_id" FROM "created")'
+      ') '
+      'SELECT * FROM "created"',
+      [body, author, quote_id],
+    )
+
+    if not rows:
+      return None
+    return cls._init_from_db(**dict(rows[0]))
+
+  def to_dict(self) -> dict:
+    """Serialize into dictionary.
+    """
 
     return {
       "id": self.id,
       "body": self.body,
       "author": self.author,
-      "quote": self.quote.id,  # pylint: disable=no-member
-      "published": self.published.isoformat(),
+      "quote": self.quote_id,
+      "published": self.published,
     }
 
   class Meta:
@@ -88,3 +234,129 @@ class Meaning(Model):
     """
 
     ordering = ["-published"]
+    indexes = (
+      ("author", "published", "id"),
+      ("quote_id", "published", "id"),
+    )
+    unique_together = (("author", "quote"),)
+
+
+class Submission(Model):
+  """Quote of the Day submission with its final number of votes.
+  """
+
+  id = fields.IntField(pk=True)
+  day = fields.DateField()
+  quote: fields.ForeignKeyRelation[Quote] = fields.ForeignKeyField(
+    model_name="models.Quote", related_name="submissions", on_delete="CASCADE")
+  quote_id: int
+  votes = fields.IntField(default=0)
+
+  def to_dict(self) -> dict:
+    """Serialize into dictionary.
+    """
+
+    return {
+      "day": self.day,
+      "quote": self.quote_id,
+      "votes": self.votes,
+    }
+
+  class Meta:
+    """Submission metadata.
+    """
+
+    ordering = ["-day", "-votes"]
+    unique_together = (("day", "quote"),)
+
+
+class QuoteOfTheDay(Model):
+  """Quote of the Day model, the winning submission of a day.
+  """
+
+  day = fields.DateField(pk=True)
+  quote: fields.ForeignKeyRelation[Quote] = fields.ForeignKeyField(
+    model_name="models.Quote", related_name="days", on_delete="CASCADE")
+  quote_id: int
+  votes = fields.IntField()
+
+  def to_dict(self) -> dict:
+    """Serialize into dictionary.
+    """
+
+    return {
+      "day": self.day,
+      "quote": self.quote_id,
+      "votes": self.votes,
+    }
+
+  class Meta:
+    """Quote of the Day metadata.
+    """
+
+    ordering = ["-day"]
+
+
+class Friendship(Model):
+  """Friendship model, a friend request until it is accepted.
+  """
+
+  id = fields.IntField(pk=True)
+  requester = fields.CharField(max_length=40)
+  addressee = fields.CharField(max_length=40)
+  accepted = fields.BooleanField(default=False)
+  created = fields.DatetimeField(auto_now_add=True)
+
+  @classmethod
+  async def create_once(
+    cls,
+    requester: str,
+    addressee: str,
+  ) -> typing.Union["Friendship", None]:
+    """Create a friend request, unless the two users already have one.
+
+    Runs as a single insert that does nothing on conflict, like
+    `Meaning.create_once`. Pairs are unique in either direction, so requests
+    the two users send each other at the same time conflict too.
+    """
+
+    _, rows = await cls._meta.db.execute_query(
+      'INSERT INTO "friendship" ("requester", "addressee") '
+      "VALUES ($1, $2) "
+      "ON CONFLICT DO NOTHING "
+      'RETURNING "id", "requester", "addressee", "accepted", "created"',
+      [requester, addressee],
+    )
+
+    if not rows:
+      return None
+    return cls._init_from_db(**dict(rows[0]))
+
+  @classmethod
+  async def accept(cls, requester: str, addressee: str) -> bool:
+    """Accept a pending friend request, if there is one.
+    """
+
+    return bool(await cls \
+      .filter(requester=requester, addressee=addressee, accepted=False) \
+      .update(accepted=True))
+
+  def to_dict(self) -> dict:
+    """Serialize into dictionary.
+    """
+
+    return {
+      "id": self.id,
+      "requester": self.requester,
+      "addressee": self.addressee,
+      "accepted": self.accepted,
+      "created": self.created,
+    }
+
+  class Meta:
+    """Friendship metadata.
+    """
+
+    ordering = ["-created"]
+    indexes = (("addressee", "accepted"),)
+    unique_together = (("requester", "addressee"),)
@@ -6,6 +6,10 @@ from starlette.routing import Route
 from app.endpoints import authors
 from app.endpoints import quotes
 from app.endpoints import meanings
+from app.endpoints import qotd
+from app.endpoints import friends
+from app.endpoints import timeline
+from app.endpoints import metrics
 
 # Routes for the application.
 ROUTES = [
@@ -28,6 +32,18 @@ ROUTES = [
     methods=["GET"],
   ),
 
+  # Get many quotes.
+  Route(
+    "/quotes",
+    endpoint=quotes.get_quotes,
+    methods=["GET"],
+  ),
+  # Search quotes.
+  Route(
+    "/quotes/search",
+    endpoint=quotes.search_quotes,
+    methods=["GET"],
+  ),
   # Create quote.
   Route(
     "/quotes",
@@ -46,6 +62,12 @@ ROUTES = [
     endpoint=quotes.disown_quote,
     methods=["DELETE"],
   ),
+  # Get meanings of a quote.
+  Route(
+    "/quotes/{quote_id}/meanings",
+    endpoint=meanings.get_meanings_of_quote,
+    methods=["GET"],
+  ),
   # Create meaning.
   Route(
     "/quotes/{quote_id}/meanings",
@@ -65,4 +87,74 @@ ROUTES = [
     endpoint=meanings.disown_meaning,
     methods=["DELETE"],
   ),
+
+  # Get the newest quotes from friends.
+  Route(
+    "/timeline",
+    endpoint=timeline.get_timeline,
+    methods=["GET"],
+  ),
+
+  # Get friends.
+  Route(
+    "/friends",
+    endpoint=friends.get_friends,
+    methods=["GET"],
+  ),
+  # Get pending friend requests.
+  Route(
+    "/friends/requests",
+    endpoint=friends.get_friend_requests,
+    methods=["GET"],
+  ),
+  # Send a friend request.
+  Route(
+    "/friends/{username}",
+    endpoint=friends.request_friendship,
+    methods=["POST"],
+  ),
+  # Remove a friend, or cancel or decline a friend request.
+  Route(
+    "/friends/{username}",
+    endpoint=friends.remove_friendship,
+    methods=["DELETE"],
+  ),
+  # Accept a friend request.
+  Route(
+    "/friends/{username}/accept",
+    endpoint=friends.accept_friendship,
+    methods=["POST"],
+  ),
+
+  # Get the latest Quote of the Day.
+  Route(
+    "/qotd",
+    endpoint=qotd.get_quote_of_the_day,
+    methods=["GET"],
+  ),
+  # Get the submissions of today, most voted first.
+  Route(
+    "/qotd/submissions",
+    endpoint=qotd.get_submissions,
+    methods=["GET"],
+  ),
+  # Submit a quote for today.
+  Route(
+    "/qotd/submissions/{quote_id}",
+    endpoint=qotd.submit_quote,
+    methods=["POST"],
+  ),
+  # Vote for a submission of today.
+  Route(
+    "/qotd/submissions/{quote_id}/votes",
+    endpoint=qotd.vote_for_quote,
+    methods=["POST"],
+  ),
+
+  # Get metrics.
+  Route(
+    "/metrics",
+    endpoint=metrics.get_metrics,
+    methods=["GET"],
+  ),
 ]
@@ -10,6 +10,7 @@ from sentry_sdk.integrations.asgi import SentryAsgiMiddleware
 
 from app import utils
 from app.utils.auth import AuthMiddleware
+from app.utils.metrics import MetricsMiddleware
 from app.utils.lifespan import get_lifespan
 
 # Load whether or not to run the application in debug mode from config.
@@ -18,12 +19,14 @@ DEBUG = utils.config("DEBUG", cast=bool, default=False)
 # Load any middleware to run with the application.
 MIDDLEWARE: typing.Sequence[Middleware] = [
   Middleware(SentryAsgiMiddleware),
+  Middleware(MetricsMiddleware),
   Middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"]),
-  Middleware(AuthMiddleware),
+  # Metrics are scraped with a token of their own rather than a user token.
+  Middleware(AuthMiddleware, public_paths=["/metrics"]),
 ]
 
 # Collection of handlers for HTTP exceptions.
@@ -59,6 +62,18 @@ TORTOISE_ORM = {
 # Redis connection URL.
 REDIS_URL = utils.config("REDIS_URL")
 
+# Outgoing HTTP connection pool configurations.
+HTTP_CLIENT = {
+  "limit":
+    utils.config("HTTP_POOL_LIMIT", cast=int, default=100),
+  "keepalive_timeout":
+    utils.config("HTTP_KEEPALIVE_TIMEOUT", cast=float, default=30),
+  "dns_cache_ttl":
+    utils.config("HTTP_DNS_CACHE_TTL", cast=int, default=300),
+  "timeout":
+    utils.config("HTTP_TIMEOUT", cast=float, default=10),
+}
+
 # Sentry DSN.
 SENTRY_DSN = utils.config("SENTRY_DSN", default=None)
 
@@ -67,5 +82,6 @@ SENTRY_DSN = utils.config("SENTRY_DSN", default=None)
 LIFESPAN: typing.AsyncGenerator = get_lifespan(
   sentry_dsn=SENTRY_DSN,
   redis_url=REDIS_URL,
+  http_config=HTTP_CLIENT,
   tortoise_config=TORTOISE_ORM,
 )
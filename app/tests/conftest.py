@@ -1,12 +1,39 @@
 """Testing configurations.
 """
 
+# pylint: disable=redefined-outer-name
+
+import os
+import typing
+import asyncio
+import contextlib
+
 import pytest
 from starlette.config import environ
 from starlette.testclient import TestClient
 
 environ["TESTING"] = "TRUE"
 
+# Users known to the stubbed Auth0.
+USERS = [
+  {
+    "user_id": "auth0|alice",
+    "username": "alice",
+    "picture": "https://picture.test/alice.png",
+  },
+  {
+    "user_id": "auth0|bob",
+    "username": "bob",
+    "picture": "https://picture.test/bob.png",
+  },
+]
+
+# Raw queries of some models are written for PostgreSQL only.
+postgres_only = pytest.mark.skipif(
+  not os.environ.get("TEST_DATABASE_URL", "").startswith("postgres"),
+  reason="TEST_DATABASE_URL doesn't point at a PostgreSQL database.",
+)
+
 
 @pytest.fixture(autouse=True, scope="session")
 def setup_test_database():
@@ -22,3 +49,56 @@ def client():
   from app import app  # pylint: disable=import-outside-toplevel
   with TestClient(app) as test_client:
     yield test_client
+
+
+@pytest.fixture()
+def loop():
+  """Event loop shared by test cases and the offline client.
+  """
+
+  event_loop = asyncio.new_event_loop()
+  asyncio.set_event_loop(event_loop)
+  yield event_loop
+  event_loop.close()
+  asyncio.set_event_loop(None)
+
+
+@pytest.fixture()
+def signing_key(loop):
+  """Set up in-memory stand-ins for Redis, Auth0 and the database.
+
+  The database is SQLite unless `TEST_DATABASE_URL` points at a scratch
+  database to use instead. Yields the key to sign tokens of `USERS` with.
+  """
+
+  # pylint: disable=import-outside-toplevel
+  from benchmarks.harness import backends
+
+  stack = contextlib.AsyncExitStack()
+  key = loop.run_until_complete(
+    stack.enter_async_context(
+      backends(users=USERS, database_url=os.environ.get("TEST_DATABASE_URL"))))
+  yield key
+  loop.run_until_complete(stack.aclose())
+
+
+@pytest.fixture()
+def authorization(signing_key) -> typing.Callable[[str], str]:
+  """Make Authorization headers of users available to test cases.
+  """
+
+  return lambda user_id: f"Bearer {signing_key.sign(user_id)}"
+
+
+@pytest.fixture()
+def offline_client(authorization):
+  """Make a client available that needs none of the app's services.
+
+  The lifespan isn't run, the stand-ins of `signing_key` are used instead.
+  Requests are made as the first of `USERS` by default.
+  """
+
+  from app import app  # pylint: disable=import-outside-toplevel
+  test_client = TestClient(app)
+  test_client.headers["Authorization"] = authorization(USERS[0]["user_id"])
+  return test_client
@@ -0,0 +1,90 @@
+"""Tests for authentication.
+"""
+
+import time
+import asyncio
+
+import pytest
+
+from app.utils import auth
+from app.utils.auth import token_cache
+from app.utils.http import HTTP
+from app.utils.redis import Redis as RedisPool
+from app.tests.conftest import USERS
+
+
+def test_verified_tokens_are_cached(offline_client):
+  """Tokens are verified once, then their claims are served from the cache.
+  """
+
+  assert offline_client.get("/authors/alice").status_code == 200
+  hits = token_cache.stats()["hits"]
+
+  assert offline_client.get("/authors/alice").status_code == 200
+  assert token_cache.stats()["hits"] == hits + 1
+
+
+def test_cached_tokens_expire_with_their_claims(offline_client, signing_key):
+  """Cached claims stop being served once the token expires.
+  """
+
+  token = signing_key.sign(USERS[0]["user_id"], expires_in=1)
+  headers = {"Authorization": f"Bearer {token}"}
+  expires_at = int(time.time()) + 1
+
+  assert offline_client.get("/authors/alice", headers=headers) \
+    .status_code == 200
+
+  # Wait until the token is expired to the second, as claims are checked.
+  time.sleep(max(0, expires_at + 1 - time.time()))
+
+  response = offline_client.get("/authors/alice", headers=headers)
+  assert response.status_code == 401
+  assert response.json() == {"message": "Authorization token is expired"}
+
+
+@pytest.mark.usefixtures("signing_key")
+def test_concurrent_user_lookups_share_one_search(loop):
+  """Concurrent lookups of the same users search Auth0 once.
+  """
+
+  user_ids = [user["user_id"] for user in USERS]
+
+  results = loop.run_until_complete(
+    asyncio.gather(*[auth.get_users(user_ids) for _ in range(5)]))
+
+  assert HTTP().session.searches == 1
+  for authors in results:
+    assert sorted(authors) == sorted(user_ids)
+
+
+@pytest.mark.usefixtures("signing_key")
+def test_failed_user_searches_leave_users_out(loop):
+  """Users Auth0 doesn't answer for are left out instead of failing.
+  """
+
+  HTTP().session.search_status = 429
+
+  authors = loop.run_until_complete(
+    auth.get_users(user["user_id"] for user in USERS))
+
+  assert not authors
+
+
+@pytest.mark.usefixtures("signing_key")
+def test_failed_user_lookups_are_not_cached(loop):
+  """Users Auth0 doesn't answer for aren't found, until it answers again.
+  """
+
+  user_id = USERS[0]["user_id"]
+  HTTP().session.lookup_status = 429
+
+  assert loop.run_until_complete(auth.get_user(user_id=user_id)) is None
+  assert not loop.run_until_complete(
+    RedisPool().connection.hgetall(f"userdata:{user_id}"))
+
+  HTTP().session.lookup_status = 200
+
+  author = loop.run_until_complete(auth.get_user(user_id=user_id))
+  assert (author.user_id, author.username) == (user_id, USERS[0]["username"])
+  assert loop.run_until_complete(auth.get_user(user_id="auth0|nobody")) is None
@@ -0,0 +1,75 @@
+"""Tests for author related endpoints.
+"""
+
+import typing
+from datetime import datetime, timezone
+
+from app.models import Meaning, Quote
+from app.tests.conftest import USERS
+
+
+def _pages(offline_client, url: str, count: int) -> typing.List[dict]:
+  """Follow a feed from page to page.
+  """
+
+  pages = []
+  params = {"count": count}
+  while True:
+    response = offline_client.get(url, params=params)
+    assert response.status_code == 200, response.text
+    pages.append(response.json())
+    if not pages[-1]["next"]:
+      return pages
+    params["cursor"] = pages[-1]["next"]
+
+
+def test_feeds_page_through_rows_once(loop, offline_client):
+  """Pages continue after the last row, even among rows published together.
+  """
+
+  author_id = USERS[0]["user_id"]
+
+  async def create() -> typing.List[int]:
+    quotes = [
+      await Quote.create(body=f"Quote {number}.", author=author_id)
+      for number in range(5)
+    ]
+    for quote in quotes:
+      await Meaning.create(body="A meaning.", author=author_id, quote=quote)
+    # Publish the three newest at the same time, so only their IDs order them.
+    published = datetime.now(timezone.utc)
+    await Quote.filter(id__in=[quote.id for quote in quotes[2:]]) \
+      .update(published=published)
+    await Meaning.filter(quote_id__in=[quote.id for quote in quotes[2:]]) \
+      .update(published=published)
+    return [quote.id for quote in quotes]
+
+  quote_ids = loop.run_until_complete(create())
+
+  pages = _pages(offline_client, "/authors/alice/quotes", 2)
+  assert [len(page["result"]) for page in pages] == [2, 2, 1]
+  assert [quote["id"] for page in pages for quote in page["result"]] == \
+    quote_ids[::-1]
+
+  pages = _pages(offline_client, "/authors/alice/meanings", 2)
+  assert [meaning["quote"] for page in pages for meaning in page["result"]] \
+    == quote_ids[::-1]
+
+
+def test_invalid_feed_cursors_are_rejected(offline_client):
+  """Cursors that weren't given by the feed are rejected.
+  """
+
+  # Not base64, then positions whose date is no date.
+  for cursor in ("cursor", "MXwy", "YWJjfDE"):
+    response = offline_client.get(
+      "/authors/alice/quotes", params={"cursor": cursor})
+    assert response.status_code == 400
+    assert response.json() == {
+      "message": "Query parameter 'cursor' is invalid."
+    }
+
+  for count in ("ten", "0"):
+    response = offline_client.get(
+      "/authors/alice/quotes", params={"count": count})
+    assert response.status_code == 400
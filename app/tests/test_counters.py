@@ -0,0 +1,39 @@
+"""Tests for counter utilities.
+"""
+
+import pytest
+
+from app.models import Quote
+from app.utils import counters
+from app.tests.conftest import USERS
+
+
+@pytest.mark.usefixtures("signing_key")
+def test_quote_count_changed_while_loading_is_not_stored(loop, monkeypatch):
+  """A count that changed while it was loaded is loaded again next time.
+  """
+
+  author_id = USERS[0]["user_id"]
+  run_script = counters.run_script
+
+  async def create_quote_while_loading(redis, script, keys, args):
+    # Stand in for a quote created and mirrored right before the count is
+    # stored.
+    if script == counters._FILL_SCRIPT:  # pylint: disable=protected-access
+      await Quote.create(body="A quote.", author=author_id)
+      await counters.count_quote(author_id)
+    return await run_script(redis, script, keys=keys, args=args)
+
+  async def check():
+    await Quote.create(body="A quote.", author=author_id)
+    await counters.count_quote(author_id)
+
+    monkeypatch.setattr(counters, "run_script", create_quote_while_loading)
+    assert await counters.get_quote_count(author_id) == 1
+    monkeypatch.setattr(counters, "run_script", run_script)
+
+    assert await counters.get_quote_count(author_id) == 2
+    await counters.count_quote(author_id)
+    assert await counters.get_quote_count(author_id) == 3
+
+  loop.run_until_complete(check())
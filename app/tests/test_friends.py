@@ -0,0 +1,40 @@
+"""Tests for friendship utilities.
+"""
+
+import pytest
+
+from app.models import Friendship
+from app.utils import friends
+from app.tests.conftest import USERS
+
+
+@pytest.mark.usefixtures("signing_key")
+def test_friendships_ended_while_loading_are_not_stored(loop, monkeypatch):
+  """Friends removed while the friend set loads aren't written back.
+  """
+
+  user_id, friend_id = (user["user_id"] for user in USERS)
+  run_script = friends.run_script
+
+  async def remove_friendship_while_loading(redis, script, keys, args):
+    # Stand in for the friendship ending right after it was loaded.
+    await Friendship.filter(requester=user_id).delete()
+    await friends.remove_friends(user_id, friend_id)
+    return await run_script(redis, script, keys=keys, args=args)
+
+  async def check():
+    await Friendship.create(
+      requester=user_id, addressee=friend_id, accepted=True)
+
+    monkeypatch.setattr(friends, "run_script", remove_friendship_while_loading)
+    assert await friends.get_friends(user_id) == {friend_id}
+    monkeypatch.setattr(friends, "run_script", run_script)
+
+    assert not await friends.are_friends(user_id, friend_id)
+    assert await friends.get_friends(user_id) == set()
+
+    # Once loaded, the set follows changes without loading again.
+    await friends.add_friends(user_id, friend_id)
+    assert await friends.are_friends(user_id, friend_id)
+
+  loop.run_until_complete(check())
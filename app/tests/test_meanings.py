@@ -0,0 +1,79 @@
+"""Tests for meaning related endpoints.
+"""
+
+import typing
+
+from tortoise import Tortoise
+
+from app.models import Meaning, Quote
+from app.utils.metrics import Metrics, instrument_database
+from app.tests.conftest import USERS
+
+
+def _count_queries(
+    func: typing.Callable[[], typing.Any]) -> typing.Tuple[typing.Any, int]:
+  """Run a function, counting the database queries it made.
+  """
+
+  def total() -> int:
+    return sum(
+      count for (system, _), (count, _) in Metrics().calls.items()
+      if system == "db")
+
+  instrument_database(Tortoise.get_connection("default"))
+  before = total()
+  result = func()
+  return result, total() - before
+
+
+def _seed(loop, count: int) -> Quote:
+  """Create a quote of the second user with meanings of the first one.
+  """
+
+  async def seed() -> Quote:
+    author_id = USERS[0]["user_id"]
+    quote = await Quote.create(body="A quote.", author=USERS[1]["user_id"])
+    for number in range(count):
+      other = await Quote.create(body=f"Quote {number}.", author=author_id)
+      await Meaning.create(body="A meaning.", author=author_id, quote=other)
+    await Meaning.create(body="A meaning.", author=author_id, quote=quote)
+    return quote
+
+  return loop.run_until_complete(seed())
+
+
+def test_meanings_from_author_cost_one_query(loop, offline_client):
+  """A page of meanings is fetched with one query, whatever its size.
+  """
+
+  _seed(loop, 9)
+
+  response, queries = _count_queries(
+    lambda: offline_client.get("/authors/alice/meanings?count=50"))
+  assert response.status_code == 200, response.text
+  assert queries == 1
+  meanings = response.json()["result"]
+  assert len(meanings) == 10
+  assert all(isinstance(meaning["quote"], int) for meaning in meanings)
+
+
+def test_meanings_of_quote_cost_no_lookup_per_meaning(loop, offline_client,
+                                                      authorization):
+  """The quote is looked up once, then its meanings with one query.
+  """
+
+  quote = _seed(loop, 0)
+  author_id = USERS[1]["user_id"]
+  loop.run_until_complete(
+    Meaning.bulk_create([
+      Meaning(body=f"Meaning {number}.", author=f"auth0|{number}", quote=quote)
+      for number in range(9)
+    ]))
+
+  response, queries = _count_queries(lambda: offline_client.get(
+    f"/quotes/{quote.id}/meanings?count=50",
+    headers={"Authorization": authorization(author_id)},
+  ))
+  assert response.status_code == 200, response.text
+  assert queries == 2
+  assert len(response.json()["result"]) == 10
@@ -0,0 +1,50 @@
+"""Tests for metrics.
+"""
+
+import pytest
+from tortoise import Tortoise
+from tortoise.transactions import in_transaction
+
+from app.endpoints import metrics
+from app.models import Quote
+from app.utils.metrics import Metrics, instrument_database
+
+
+def test_metrics_need_the_scrape_token(offline_client, monkeypatch):
+  """Metrics are only served to scrapers with the scrape token.
+  """
+
+  assert offline_client.get("/metrics").status_code == 404
+
+  monkeypatch.setattr(metrics, "_SCRAPE_TOKEN", "secret")
+  assert offline_client.get("/metrics").status_code == 401
+  assert offline_client.get(
+    "/metrics", headers={
+      "Authorization": "Bearer wrong"
+    }).status_code == 401
+
+  response = offline_client.get(
+    "/metrics", headers={"Authorization": "Bearer secret"})
+  assert response.status_code == 200
+  assert "philosopher_calls_total" in response.text
+
+
+@pytest.mark.usefixtures("signing_key")
+def test_queries_in_transactions_are_counted(loop):
+  """Queries sent inside transactions are counted like any other.
+  """
+
+  def total() -> int:
+    return sum(
+      count for (system, _), (count, _) in Metrics().calls.items()
+      if system == "db")
+
+  async def run():
+    async with in_transaction():
+      await Quote.create(body="A quote.", author="auth0|alice")
+      await Quote.all().count()
+
+  instrument_database(Tortoise.get_connection("default"))
+  before = total()
+  loop.run_until_complete(run())
+  assert total() - before == 2
@@ -0,0 +1,56 @@
+"""Tests for models.
+"""
+
+import uuid
+import asyncio
+
+import pytest
+
+from app.models import Meaning, Quote
+from app.tests.conftest import postgres_only
+
+
+@postgres_only
+@pytest.mark.usefixtures("signing_key")
+def test_create_once_creates_one_meaning_per_author(loop):
+  """A second meaning of the same author for the same quote isn't created.
+  """
+
+  # pylint: disable=unused-argument
+  async def run():
+    author_id = f"auth0|{uuid.uuid4().hex}"
+    quote = await Quote.create(body="A quote.", author="auth0|quoter")
+
+    first = await Meaning.create_once(author_id, "A meaning.", quote.id)
+    second = await Meaning.create_once(author_id, "Another.", quote.id)
+
+    assert first is not None
+    assert first.quote_id == quote.id
+    assert second is None
+    assert await Meaning.filter(author=author_id).count() == 1
+
+  loop.run_until_complete(run())
+
+
+@postgres_only
+@pytest.mark.usefixtures("signing_key")
+def test_create_once_holds_under_concurrency(loop):
+  """Concurrent submissions of the same meaning create it once, and count it
+  once on the quote.
+  """
+
+  # pylint: disable=unused-argument
+  async def run():
+    author_id = f"auth0|{uuid.uuid4().hex}"
+    quote = await Quote.create(body="A quote.", author="auth0|quoter")
+
+    created = await asyncio.gather(*[
+      Meaning.create_once(author_id, f"Meaning {number}.", quote.id)
+      for number in range(5)
+    ])
+
+    assert len([meaning for meaning in created if meaning]) == 1
+    await quote.refresh_from_db()
+    assert quote.meaning_count == 1
+
+  loop.run_until_complete(run())
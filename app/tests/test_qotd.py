@@ -0,0 +1,93 @@
+"""Tests for Quote of the Day related endpoints.
+"""
+
+import typing
+
+from app.models import Quote, QuoteOfTheDay, Submission
+from app.utils import qotd
+from app.tests.conftest import USERS
+
+
+def _submit(loop, offline_client, count: int) -> typing.List[Quote]:
+  """Create quotes of the first user and submit them for today.
+  """
+
+  async def create() -> typing.List[Quote]:
+    return [
+      await Quote.create(body=f"Quote {number}.", author=USERS[0]["user_id"])
+      for number in range(count)
+    ]
+
+  quotes = loop.run_until_complete(create())
+  for quote in quotes:
+    response = offline_client.post(f"/qotd/submissions/{quote.id}")
+    assert response.status_code == 201, response.text
+  return quotes
+
+
+def test_submissions_are_voted_for_once_a_day(loop, offline_client):
+  """Every user can vote for every submission once a day.
+  """
+
+  quote, = _submit(loop, offline_client, 1)
+
+  response = offline_client.post(f"/qotd/submissions/{quote.id}")
+  assert response.status_code == 403
+
+  response = offline_client.post(f"/qotd/submissions/{quote.id}/votes")
+  assert response.status_code == 200, response.text
+  assert response.json()["result"] == {"quote": quote.id, "votes": 1}
+
+  response = offline_client.post(f"/qotd/submissions/{quote.id}/votes")
+  assert response.status_code == 403
+  assert response.json() == {
+    "message": "You have already voted for this Quote today.",
+  }
+
+  response = offline_client.get("/qotd/submissions")
+  assert [(submission["quote"]["id"], submission["votes"])
+          for submission in response.json()["result"]] == [(quote.id, 1)]
+
+
+def test_only_submissions_are_voted_for(loop, offline_client):
+  """Votes for quotes that weren't submitted today aren't found.
+  """
+
+  quote = loop.run_until_complete(
+    Quote.create(body="A quote.", author=USERS[0]["user_id"]))
+
+  for quote_id in (quote.id, "quote"):
+    response = offline_client.post(f"/qotd/submissions/{quote_id}/votes")
+    assert response.status_code == 404
+    assert response.json() == {"message": "Not found."}
+
+
+def test_rollover_persists_tallies_and_winner(loop, offline_client,
+                                              authorization):
+  """The most voted submission wins, and ties go to the oldest quote.
+  """
+
+  first, second, third = _submit(loop, offline_client, 3)
+  headers = {"Authorization": authorization(USERS[1]["user_id"])}
+  for quote, votes in ((first, 1), (second, 2), (third, 2)):
+    for user_headers in ({}, headers)[:votes]:
+      response = offline_client.post(
+        f"/qotd/submissions/{quote.id}/votes", headers=user_headers)
+      assert response.status_code == 200, response.text
+
+  day = qotd.today()
+  winner = loop.run_until_complete(qotd.rollover(day))
+
+  assert (winner.quote_id, winner.votes) == (second.id, 2)
+  submissions = loop.run_until_complete(
+    Submission.filter(day=day).values_list("quote_id", "votes"))
+  assert sorted(submissions) == [(first.id, 1), (second.id, 2), (third.id, 2)]
+
+  # Days are only persisted once.
+  assert loop.run_until_complete(qotd.rollover(day)) is None
+  assert loop.run_until_complete(QuoteOfTheDay.filter(day=day).count()) == 1
+
+  response = offline_client.get("/qotd")
+  assert response.status_code == 200, response.text
+  result = response.json()["result"]
+  assert (result["quote"]["id"], result["votes"]) == (second.id, 2)
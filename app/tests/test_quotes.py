@@ -0,0 +1,213 @@
+"""Tests for quote related endpoints.
+"""
+
+import time
+import uuid
+import types
+
+from tortoise.expressions import F
+
+from app.models import Quote
+from app.utils import redis
+from app.tests.conftest import USERS, postgres_only
+
+
+def test_disowning_keeps_meanings_counted_meanwhile(loop, offline_client,
+                                                    monkeypatch):
+  """Meanings counted after the quote is loaded survive disowning it.
+  """
+
+  quote = loop.run_until_complete(
+    Quote.create(body="A quote.", author=USERS[0]["user_id"]))
+  get_or_none = Quote.get_or_none
+
+  async def count_meaning_after_loading(*args, **kwargs):
+    instance = await get_or_none(*args, **kwargs)
+    # Stand in for a meaning created right after the quote is loaded.
+    await Quote.filter(id=quote.id).update(meaning_count=F("meaning_count") + 1)
+    return instance
+
+  monkeypatch.setattr(Quote, "get_or_none", count_meaning_after_loading)
+  response = offline_client.delete(f"/quotes/{quote.id}")
+  monkeypatch.undo()
+
+  assert response.status_code == 200, response.text
+  quote = loop.run_until_complete(Quote.get(id=quote.id))
+  assert quote.author is None
+  assert quote.meaning_count == 1
+
+
+def test_creating_quotes_is_rate_limited(offline_client, authorization,
+                                         monkeypatch):
+  """Users can create a burst of quotes, then one more per refilled token.
+  """
+
+  now = time.time()
+  monkeypatch.setattr(
+    redis, "time",
+    types.SimpleNamespace(time=lambda: now, perf_counter=time.perf_counter))
+
+  def create_quote(**kwargs):
+    return offline_client.post(
+      "/quotes", json={"body": "A quote to remember."}, **kwargs)
+
+  # The default limit is a burst of 10 quotes, refilled over a minute.
+  for _ in range(10):
+    assert create_quote().status_code == 201
+  response = create_quote()
+  assert response.status_code == 429
+  assert response.json() == {"message": "Too many requests."}
+  assert response.headers["Retry-After"] == "6"
+
+  # Other users have buckets of their own.
+  headers = {"Authorization": authorization(USERS[1]["user_id"])}
+  assert create_quote(headers=headers).status_code == 201
+
+  # Tokens refill continuously: 3/4 of one in 4.5 seconds, the rest in 1.5.
+  now += 4.5
+  response = create_quote()
+  assert response.status_code == 429
+  assert response.headers["Retry-After"] == "2"
+
+  now += 2
+  assert create_quote().status_code == 201
+  assert create_quote().status_code == 429
+
+
+def test_unchanged_quotes_are_not_modified(loop, offline_client):
+  """Quotes are answered with 304 until they change.
+  """
+
+  quote = loop.run_until_complete(
+    Quote.create(body="A quote.", author=USERS[0]["user_id"]))
+
+  response = offline_client.get(f"/quotes/{quote.id}")
+  assert response.status_code == 200, response.text
+  etag = response.headers["ETag"]
+
+  response = offline_client.get(
+    f"/quotes/{quote.id}", headers={"If-None-Match": etag})
+  assert response.status_code == 304
+  assert response.headers["ETag"] == etag
+  assert not response.content
+
+  assert offline_client.delete(f"/quotes/{quote.id}").status_code == 200
+
+  response = offline_client.get(
+    f"/quotes/{quote.id}", headers={"If-None-Match": etag})
+  assert response.status_code == 200
+  assert response.headers["ETag"] != etag
+  assert response.json()["result"]["author"] is None
+
+
+@postgres_only
+def test_quotes_are_modified_by_new_meanings(loop, offline_client,
+                                             authorization):
+  """A new meaning of a quote changes its entity tag.
+  """
+
+  quote = loop.run_until_complete(
+    Quote.create(body="A quote.", author=USERS[0]["user_id"]))
+  etag = offline_client.get(f"/quotes/{quote.id}").headers["ETag"]
+
+  response = offline_client.post(
+    f"/quotes/{quote.id}/meanings",
+    json={"body": "A meaning to remember."},
+    headers={"Authorization": authorization(USERS[1]["user_id"])})
+  assert response.status_code == 201, response.text
+
+  response = offline_client.get(
+    f"/quotes/{quote.id}", headers={"If-None-Match": etag})
+  assert response.status_code == 200
+  assert response.headers["ETag"] != etag
+  assert response.json()["result"]["meanings"] == 1
+
+
+def test_quotes_are_fetched_in_the_requested_order(loop, offline_client):
+  """Quotes come in the order of the requested IDs, null if they're unknown.
+  """
+
+  async def create():
+    return [
+      await Quote.create(body=f"Quote {number}.", author=USERS[0]["user_id"])
+      for number in range(3)
+    ]
+
+  first, second, third = loop.run_until_complete(create())
+  unknown = third.id + 1
+
+  response = offline_client.get(
+    f"/quotes?ids={third.id},{unknown},{first.id},{second.id}")
+  assert response.status_code == 200, response.text
+  result = response.json()["result"]
+  assert [quote and quote["id"] for quote in result] == \
+    [third.id, None, first.id, second.id]
+
+
+def test_too_many_or_invalid_quote_ids_are_rejected(offline_client):
+  """Only comma separated lists of up to 50 integers are accepted.
+  """
+
+  ids = ",".join(str(quote_id) for quote_id in range(1, 52))
+  response = offline_client.get(f"/quotes?ids={ids}")
+  assert response.status_code == 400
+  assert response.json() == {
+    "message": "Query parameter 'ids' must have at most 50 integers.",
+  }
+
+  for ids in ("1,two", ""):
+    response = offline_client.get(f"/quotes?ids={ids}")
+    assert response.status_code == 400
+
+  ids = ",".join(str(quote_id) for quote_id in range(1, 51))
+  assert offline_client.get(f"/quotes?ids={ids}").status_code == 200
+
+
+@postgres_only
+def test_search_pages_through_matches(loop, offline_client):
+  """Matches are paged best first, each of them once.
+  """
+
+  # A word no other quote has, so earlier tests' quotes don't match.
+  word = f"w{uuid.uuid4().hex}"
+
+  async def create():
+    return [
+      await Quote.create(
+        body=f"{' '.join([word] * repeat)} {number}.",
+        author=USERS[0]["user_id"])
+      for number, repeat in enumerate((1, 3, 1, 2, 1))
+    ]
+
+  quotes = loop.run_until_complete(create())
+
+  found = []
+  params = {"q": word, "count": 2}
+  while True:
+    response = offline_client.get("/quotes/search", params=params)
+    assert response.status_code == 200, response.text
+    found.extend(quote["id"] for quote in response.json()["result"])
+    if not response.json()["next"]:
+      break
+    params["cursor"] = response.json()["next"]
+
+  # Quotes with the word more often rank first, ties newest first.
+  assert found == [
+    quotes[1].id, quotes[3].id, quotes[4].id, quotes[2].id, quotes[0].id
+  ]
+
+
+def test_search_terms_are_required(offline_client):
+  """Searches need terms, of a reasonable length.
+  """
+
+  for terms in ("", "   ", "a" * 201):
+    response = offline_client.get("/quotes/search", params={"q": terms})
+    assert response.status_code == 400
+
+  response = offline_client.get(
+    "/quotes/search", params={
+      "q": "quote",
+      "cursor": "cursor"
+    })
+  assert response.status_code == 400
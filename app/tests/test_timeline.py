@@ -0,0 +1,114 @@
+"""Tests for timeline related endpoints.
+"""
+
+import typing
+
+from app.models import Friendship
+from app.utils import friends, timeline
+from app.utils.redis import Redis
+from app.tests.conftest import USERS
+
+
+def _befriend(loop):
+  """Make the first two users friends.
+  """
+
+  async def befriend():
+    await Friendship.create(
+      requester=USERS[0]["user_id"],
+      addressee=USERS[1]["user_id"],
+      accepted=True)
+    await friends.add_friends(USERS[0]["user_id"], USERS[1]["user_id"])
+
+  loop.run_until_complete(befriend())
+
+
+def _pages(offline_client, count: int) -> typing.List[dict]:
+  """Follow the timeline of the first user from page to page.
+  """
+
+  pages = []
+  params = {"count": count}
+  while True:
+    response = offline_client.get("/timeline", params=params)
+    assert response.status_code == 200, response.text
+    pages.append(response.json())
+    if not pages[-1]["next"]:
+      return pages
+    params["cursor"] = pages[-1]["next"]
+
+
+def test_timelines_page_through_quotes_of_friends(loop, offline_client,
+                                                  authorization):
+  """Quotes of friends are paged newest first, each of them once.
+  """
+
+  _befriend(loop)
+  headers = {"Authorization": authorization(USERS[1]["user_id"])}
+  quote_ids = []
+  for number in range(5):
+    response = offline_client.post(
+      "/quotes", json={"body": f"Quote number {number}."}, headers=headers)
+    assert response.status_code == 201, response.text
+    quote_ids.append(response.json()["result"]["id"])
+
+  pages = _pages(offline_client, 2)
+
+  assert [len(page["result"]) for page in pages] == [2, 2, 1]
+  assert [quote["id"] for page in pages for quote in page["result"]] == \
+    quote_ids[::-1]
+
+
+def test_timelines_skip_quotes_of_former_friends(loop, offline_client,
+                                                 authorization):
+  """Quotes of former friends are skipped, without ending paging early.
+  """
+
+  _befriend(loop)
+  headers = {"Authorization": authorization(USERS[1]["user_id"])}
+  for number in range(3):
+    response = offline_client.post(
+      "/quotes", json={"body": f"Quote number {number}."}, headers=headers)
+    assert response.status_code == 201, response.text
+
+  assert offline_client.delete("/friends/bob").status_code == 200
+
+  pages = _pages(offline_client, 2)
+
+  assert len(pages) == 2
+  assert all(not page["result"] for page in pages)
+
+
+def test_timelines_pull_quotes_of_popular_friends(loop, offline_client,
+                                                  authorization, monkeypatch):
+  """Quotes of friends with too many friends to push to are pulled instead.
+  """
+
+  monkeypatch.setattr(timeline, "_FANOUT_LIMIT", 0)
+  _befriend(loop)
+  headers = {"Authorization": authorization(USERS[1]["user_id"])}
+  quote_ids = []
+  for number in range(3):
+    response = offline_client.post(
+      "/quotes", json={"body": f"Quote number {number}."}, headers=headers)
+    assert response.status_code == 201, response.text
+    quote_ids.append(response.json()["result"]["id"])
+
+  # Nothing was pushed, the author was marked to be pulled from instead.
+  assert not loop.run_until_complete(Redis().connection.lrange(
+    f"philosopher:timeline:{USERS[0]['user_id']}", 0, -1))
+
+  pages = _pages(offline_client, 2)
+
+  assert [quote["id"] for page in pages for quote in page["result"]] == \
+    quote_ids[::-1]
+
+
+def test_invalid_timeline_cursors_are_rejected(offline_client):
+  """Cursors that weren't given by the timeline are rejected.
+  """
+
+  # Neither base64, nor one ID, nor an integer.
+  for cursor in ("cursor", "MXwy", "YWJj"):
+    response = offline_client.get("/timeline", params={"cursor": cursor})
+    assert response.status_code == 400
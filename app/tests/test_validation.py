@@ -0,0 +1,122 @@
+"""Tests for request body validation.
+"""
+
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.routing import Route
+from starlette.testclient import TestClient
+from typesystem import Schema, String
+
+from app.schemas import QuoteSchema
+from app.utils.decorators import validate_body
+from app.utils.responses import ORJSONResponse
+from app.utils.validation import CompiledSchema
+
+
+class _OptionsSchema(Schema):
+  """Schema with the string options the quote and meaning schemas don't use.
+  """
+
+  code = String(pattern=r"^[a-z]+$", max_length=8)
+  note = String(allow_null=True, default=None, max_length=20)
+  title = String(allow_blank=True, trim_whitespace=False, max_length=20)
+
+
+@pytest.mark.parametrize("schema", [QuoteSchema, _OptionsSchema])
+@pytest.mark.parametrize("value", [
+  {
+    "body": "A quote long enough.",
+    "code": "abc",
+    "title": "",
+  },
+  {
+    "body": "   A quote with spaces around it.   ",
+    "code": "abc",
+    "note": None,
+    "title": "  spaced  ",
+  },
+  {
+    "body": "short",
+    "code": "ABC",
+    "note": "",
+    "title": None,
+  },
+  {
+    "body": "x" * 141,
+    "code": "abcdefghi",
+    "note": "x" * 21,
+    "title": "x" * 21,
+  },
+  {
+    "body": "\0 A quote with NUL characters.\0",
+    "code": "a\0b",
+    "title": "\0",
+  },
+  {
+    "body": None,
+    "code": 1,
+    "title": [],
+  },
+  {
+    "body": "   ",
+    "extra": "ignored",
+  },
+  {},
+  None,
+  [],
+  "body",
+])
+def test_compiled_schema_matches_typesystem(schema, value):
+  """Compiled schemas give the same results and errors as typesystem.
+  """
+
+  validated, errors = CompiledSchema(schema).validate_or_error(value)
+  expected, expected_errors = schema.validate_or_error(value)
+
+  assert errors == (dict(expected_errors) if expected_errors else None)
+  assert validated == expected
+
+
+def _client() -> TestClient:
+  """Make a client for an endpoint that validates quote bodies.
+  """
+
+  @validate_body(QuoteSchema)
+  async def endpoint(_request: Request, data: QuoteSchema) -> ORJSONResponse:
+    return ORJSONResponse({"body": data.body})
+
+  app = Starlette(routes=[Route("/", endpoint=endpoint, methods=["POST"])])
+  return TestClient(app)
+
+
+def test_validate_body_rejects_oversized_bodies():
+  """Bodies too large to be valid are rejected, with or without a length.
+  """
+
+  client = _client()
+  body = b'{"body": "' + b"x" * CompiledSchema(QuoteSchema).max_size + b'"}'
+
+  assert client.post("/", data=body).status_code == 413
+  # Streamed bodies come without a length, in chunks.
+  chunks = (body[start:start + 100] for start in range(0, len(body), 100))
+  assert client.post("/", data=chunks).status_code == 413
+
+
+def test_validate_body_passes_valid_bodies():
+  """Valid bodies reach the endpoint, invalid ones are described.
+  """
+
+  client = _client()
+
+  response = client.post("/", json={"body": "  A quote long enough.  "})
+  assert response.status_code == 200
+  assert response.json() == {"body": "A quote long enough."}
+
+  response = client.post("/", json={"body": "short"})
+  assert response.status_code == 400
+  assert response.json()["result"] == {
+    "body": "Must have at least 10 characters."
+  }
+
+  assert client.post("/", data=b"{").status_code == 400
@@ -2,17 +2,24 @@
 """
 
 import json
+import time
 import typing
+import asyncio
+import hashlib
 
-import aiohttp
+import sentry_sdk
 from aioredis import Redis
 from jose import jwt, exceptions
 from starlette.requests import Request
-from starlette.responses import JSONResponse, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response
+from starlette.types import ASGIApp, Receive, Scope, Send
 
-from app.utils import config
+from app.utils import config, Singleton
 from app.utils.redis import Redis as RedisPool
+from app.utils.http import HTTP
+from app.utils.cache import LRUCache
+from app.utils.responses import ORJSONResponse
+from app.utils.coalesce import SingleFlight
 from app.models import Author
 
 _BASE_URL = config("AUTH0_BASE_URL")
@@ -21,6 +28,33 @@ _CLIENT_SECRET = config("AUTH0_CLIENT_SECRET")
 _ALGORITHMS = ["RS256"]
 _AUDIENCE = config("AUTH0_AUTH_AUDIENCE", default="philosopher")
 
+# Claims of tokens that have already been verified, keyed by token digest.
+# Tokens without an expiry claim are only trusted for the fallback TTL.
+token_cache = LRUCache(
+  maxsize=config("AUTH_TOKEN_CACHE_SIZE", cast=int, default=4096),
+  ttl=config("AUTH_TOKEN_CACHE_TTL", cast=int, default=300),
+)
+
+# Seconds before cached user profiles should be refreshed, and seconds after
+# that during which they are still served while a refresh runs.
+_USER_TTL = config("AUTH0_USER_TTL", cast=int, default=600)
+_USER_STALE_TTL = config("AUTH0_USER_STALE_TTL", cast=int, default=86400)
+
+# Maximum number of users to search for in one Auth0 request.
+_USER_SEARCH_PAGE_SIZE = 50
+
+# Only one Auth0 lookup per key is in flight at a time. Optionally, a Redis
+# lock extends that guarantee across every instance of the app.
+_flights = SingleFlight(
+  distributed=config("AUTH0_DISTRIBUTED_LOCK", cast=bool, default=False))
+
+# Seconds between background refreshes of the signing keys.
+_JWKS_REFRESH_INTERVAL = config(
+  "AUTH0_JWKS_REFRESH_INTERVAL", cast=int, default=3600)
+# Minimum seconds between refetches triggered by an unknown key ID.
+_JWKS_REFETCH_INTERVAL = config(
+  "AUTH0_JWKS_REFETCH_INTERVAL", cast=int, default=30)
+
 
 async def __get_management_token() -> str:
   """Get management token to use the Auth0 Management API.
@@ -32,27 +66,39 @@ async def __get_management_token() -> str:
   token = await redis.get("philosopher:token")
   # If no cache, fetch new.
   if not token:
+    token = await _flights.do(
+      "philosopher:token",
+      __fetch_management_token,
+      recheck=lambda: redis.get("philosopher:token"),
+    )
+
+  # Return token.
+  return token
 
-    # Send the request for a new token.
-    session = aiohttp.ClientSession(
-      headers={"Content-Type": "application/json"})
-    response = await session.post(
-      f"https://{_BASE_URL}/oauth/token",
-      data=json.dumps({
-        "client_id": _CLIENT_ID,
-        "client_secret": _CLIENT_SECRET,
-        "audience": f"https://{_BASE_URL}/api/v2/",
-        "grant_type": "client_credentials"
-      }))
+
+async def __fetch_management_token() -> str:
+  """Fetch and cache a new management token.
+  """
+
+  redis: Redis = RedisPool().connection
+
+  # Send the request for a new token.
+  async with HTTP().session.post(
+    f"https://{_BASE_URL}/oauth/token",
+    headers={"Content-Type": "application/json"},
+    data=json.dumps({
+      "client_id": _CLIENT_ID,
+      "client_secret": _CLIENT_SECRET,
+      "audience": f"https://{_BASE_URL}/api/v2/",
+      "grant_type": "client_credentials"
+    })) as response:
     token_data = await response.json()
-    await session.close()
 
-    # Store the token data.
-    token = token_data["access_token"]
-    expires_in = token_data["expires_in"]
-    await redis.set("philosopher:token", token, expire=expires_in)
+  # Store the token data.
+  token = token_data["access_token"]
+  expires_in = token_data["expires_in"]
+  await redis.set("philosopher:token", token, expire=expires_in)
 
-  # Return token.
   return token
 
 
@@ -79,35 +125,118 @@ async def __get_user_identifier(
     field_wanted = "username"
 
   # Fetch username from cache.
-  value_wanted = await redis.get(f"{field_wanted}:{value_had}")
+  cache_key = f"{field_wanted}:{value_had}"
+  value_wanted = await redis.get(cache_key)
 
   # Fetch fresh username if we don't have any in cache.
   if not value_wanted:
-    token = await __get_management_token()
-
-    session = aiohttp.ClientSession(
-      headers={"Authorization": f"Bearer {token}"})
-    response = await session.get(
-      f"https://{_BASE_URL}/api/v2/users" \
-      f"?q={field_had}:\"{value_had}\"" \
-      f"&fields={field_wanted}" \
-       "&include_fields=true")
-    result = await response.json()
-    try:
-      user_data = result.pop()
-    except IndexError:
-      await session.close()
-      return None
-    await session.close()
-    value_wanted = user_data[field_wanted]
 
-    # Cache username indefinitely.
-    await redis.set(f"{field_wanted}:{value_had}", value_wanted)
+    async def fetch() -> typing.Union[str, None]:
+      token = await __get_management_token()
+
+      async with HTTP().session.get(
+          f"https://{_BASE_URL}/api/v2/users" \
+          f"?q={field_had}:\"{value_had}\"" \
+          f"&fields={field_wanted}" \
+           "&include_fields=true",
+          headers={"Authorization": f"Bearer {token}"}) as response:
+        result = await response.json()
+      try:
+        user_data = result.pop()
+      except IndexError:
+        return None
+
+      # Cache username indefinitely.
+      await redis.set(cache_key, user_data[field_wanted])
+      return user_data[field_wanted]
+
+    value_wanted = await _flights.do(
+      cache_key,
+      fetch,
+      recheck=lambda: redis.get(cache_key),
+    )
 
   # Return the username.
   return value_wanted
 
 
+async def _fetch_user_data(user_id: str) -> typing.Union[dict, None]:
+  """Fetch and cache fresh profile data of a user.
+
+  Returns None, caching nothing, if Auth0 doesn't answer with the user.
+  """
+
+  redis: Redis = RedisPool().connection
+
+  token = await __get_management_token()
+  fields_string = ",".join(["user_id", "username", "picture"])
+
+  async with HTTP().session.get(
+      f"https://{_BASE_URL}/api/v2/users/{user_id}" \
+      f"?fields={fields_string}" \
+       "&include_fields=true",
+      headers={"Authorization": f"Bearer {token}"}) as response:
+    if response.status != 200:
+      # Unknown users aren't worth reporting, failures like rate limits are.
+      if response.status != 404:
+        sentry_sdk.capture_message(
+          f"Auth0 user lookup failed with status {response.status}.")
+      return None
+    user_data = await response.json()
+
+  # Cache user profile data, keeping it around as stale data for a while
+  # after it should be refreshed.
+  await redis.hmset_dict(
+    f"userdata:{user_id}",
+    user_data,
+    expires_at=time.time() + _USER_TTL,
+  )
+  await redis.expire(f"userdata:{user_id}", _USER_TTL + _USER_STALE_TTL)
+
+  return user_data
+
+
+async def _get_fresh_user_data(user_id: str) -> typing.Union[dict, None]:
+  """Get profile data of a user from cache, only if it is still fresh.
+  """
+
+  redis: Redis = RedisPool().connection
+
+  user_data = await redis.hgetall(f"userdata:{user_id}")
+  if not user_data or float(user_data.get("expires_at", 0)) <= time.time():
+    return None
+  return user_data
+
+
+async def _revalidate_user_data(user_id: str) -> typing.Union[dict, None]:
+  """Refresh profile data of a user, at most once at a time.
+  """
+
+  return await _flights.do(
+    f"userdata:{user_id}",
+    lambda: _fetch_user_data(user_id),
+    recheck=lambda: _get_fresh_user_data(user_id),
+  )
+
+
+def _report_failure(task: asyncio.Task):
+  """Report exceptions of background tasks nobody is waiting on.
+  """
+
+  if not task.cancelled() and task.exception():
+    sentry_sdk.capture_exception(task.exception())
+
+
+def _to_author(user_data: dict) -> Author:
+  """Build an author from cached or fetched profile data.
+  """
+
+  return Author(
+    user_id=user_data["user_id"],
+    username=user_data["username"],
+    picture=user_data["picture"])
+
+
 async def get_user(
   user_id: str = None,
   username: str = None,
@@ -125,49 +254,147 @@ async def get_user(
   # Fetch user data from cache.
   user_data = await redis.hgetall(f"userdata:{user_id}")
 
-  # Fetch fresh data if we don't have any in cache.
   if not user_data:
-    token = await __get_management_token()
-    fields_string = ",".join(["user_id", "username", "picture"])
+    # Fetch fresh data if we don't have any in cache.
+    user_data = await _revalidate_user_data(user_id)
+    if not user_data:
+      return None
+  elif float(user_data.get("expires_at", 0)) <= time.time():
+    # Serve stale data while it is refreshed in the background.
+    task = asyncio.ensure_future(_revalidate_user_data(user_id))
+    task.add_done_callback(_report_failure)
 
-    session = aiohttp.ClientSession(
-      headers={"Authorization": f"Bearer {token}"})
-    response = await session.get(
-      f"https://{_BASE_URL}/api/v2/users/{user_id}" \
-      f"?fields={fields_string}" \
-       "&include_fields=true")
-    user_data = await response.json()
-    await session.close()
+  # Return the user data.
+  return _to_author(user_data)
 
-    # Cache user profile data for 10 minutes.
-    await redis.hmset_dict(f"userdata:{user_id}", user_data)
-    await redis.expire(f"userdata:{user_id}", 600)
 
-  # Return the user data.
-  return Author(
-    user_id=user_data["user_id"],
-    username=user_data["username"],
-    picture=user_data["picture"])
+async def _fetch_users_data(
+    user_ids: typing.List[str]) -> typing.Dict[str, dict]:
+  """Fetch and cache fresh profile data of many users at once.
+  """
 
+  redis: Redis = RedisPool().connection
 
-def _find_matching_key(kid: str, keys: typing.List[dict]) -> dict:
-  """Find matching key for a specific key ID.
+  token = await __get_management_token()
+  fields_string = ",".join(["user_id", "username", "picture"])
+
+  # Search for every user in as few requests as the page size allows.
+  users_data = []
+  for start in range(0, len(user_ids), _USER_SEARCH_PAGE_SIZE):
+    chunk = user_ids[start:start + _USER_SEARCH_PAGE_SIZE]
+    query = " OR ".join(f"\"{user_id}\"" for user_id in chunk)
+    async with HTTP().session.get(
+        f"https://{_BASE_URL}/api/v2/users",
+        params={
+          "q": f"user_id:({query})",
+          "fields": fields_string,
+          "include_fields": "true",
+          "per_page": str(len(chunk)),
+        },
+        headers={"Authorization": f"Bearer {token}"}) as response:
+      if response.status != 200:
+        # Leave out users Auth0 didn't answer for, like when rate limited.
+        sentry_sdk.capture_message(
+          f"Auth0 user search failed with status {response.status}.")
+        continue
+      users_data.extend(await response.json())
+
+  # Cache every user profile in one round trip.
+  expires_at = time.time() + _USER_TTL
+  pipeline = redis.pipeline()
+  for user_data in users_data:
+    pipeline.hmset_dict(
+      f"userdata:{user_data['user_id']}",
+      user_data,
+      expires_at=expires_at,
+    )
+    pipeline.expire(
+      f"userdata:{user_data['user_id']}",
+      _USER_TTL + _USER_STALE_TTL,
+    )
+  await pipeline.execute()
+
+  return {user_data["user_id"]: user_data for user_data in users_data}
+
+
+async def _revalidate_users_data(
+    user_ids: typing.List[str]) -> typing.Dict[str, dict]:
+  """Refresh profile data of many users, at most once at a time per user.
+
+  Users already being refreshed, alone or in another batch, are waited on
+  rather than fetched again.
   """
 
-  rsa_key = {}
-  for key in keys:
-    # If the issuer key ID matches the unverified header key ID.
-    if key["kid"] == kid:
-      # Assume that's the right key and store key data.
-      rsa_key = {
-        "kty": key["kty"],
-        "kid": key["kid"],
-        "use": key["use"],
-        "n": key["n"],
-        "e": key["e"]
-      }
+  keys = {f"userdata:{user_id}": user_id for user_id in user_ids}
+
+  async def fetch(pending: typing.List[str]) -> typing.Dict[str, dict]:
+    users_data = await _fetch_users_data([keys[key] for key in pending])
+    return {
+      f"userdata:{user_id}": user_data
+      for user_id, user_data in users_data.items()
+    }
+
+  results = await _flights.do_many(list(keys), fetch)
+  return {
+    keys[key]: user_data for key, user_data in results.items() if user_data
+  }
+
+
+async def get_users(user_ids: typing.Iterable[str]) -> typing.Dict[str, Author]:
+  """Get rich user data for many users at once, keyed by user ID.
+
+  Users that can't be found are left out of the result.
+  """
+
+  # Skip duplicates and disowned resources.
+  user_ids = list(dict.fromkeys(user_id for user_id in user_ids if user_id))
+  if not user_ids:
+    return {}
+
+  redis: Redis = RedisPool().connection
+
+  # Fetch every cached user profile in one round trip.
+  pipeline = redis.pipeline()
+  for user_id in user_ids:
+    pipeline.hgetall(f"userdata:{user_id}")
+  cached = await pipeline.execute()
+
+  users_data = {}
+  missing = []
+  stale = []
+  for user_id, user_data in zip(user_ids, cached):
+    if not user_data:
+      missing.append(user_id)
+      continue
+    if float(user_data.get("expires_at", 0)) <= time.time():
+      stale.append(user_id)
+    users_data[user_id] = user_data
+
+  # Fetch fresh data for every user we don't have in cache.
+  if missing:
+    users_data.update(await _revalidate_users_data(missing))
+
+  # Serve stale data while it is refreshed in the background.
+  if stale:
+    task = asyncio.ensure_future(_revalidate_users_data(stale))
+    task.add_done_callback(_report_failure)
+
+  return {
+    user_id: _to_author(user_data) for user_id, user_data in users_data.items()
+  }
+
+
+def _parse_key(key: dict) -> dict:
+  """Keep only the parts of a JSON Web Key needed to verify signatures.
+  """
 
-  return rsa_key
+  return {
+    "kty": key["kty"],
+    "kid": key["kid"],
+    "use": key["use"],
+    "n": key["n"],
+    "e": key["e"]
+  }
 
 
 async def _get_keys(from_cache: bool = True) -> dict:
@@ -186,26 +413,134 @@ async def _get_keys(from_cache: bool = True) -> dict:
     jwks = json.loads(keys_raw)
   else:
     # Get a fresh set of keys.
-    session = aiohttp.ClientSession()
-    response = await session.get(f"https://{_BASE_URL}/.well-known/jwks.json")
-    jwks = await response.json()
-    await session.close()
+    async with HTTP().session.get(
+        f"https://{_BASE_URL}/.well-known/jwks.json") as response:
+      jwks = await response.json()
     # Cache the keys for maximum one day.
     await redis.set("philosopher:jwks", json.dumps(jwks), expire=86400)
 
   return jwks
 
 
-class AuthMiddleware(BaseHTTPMiddleware):
+class KeyStore(Singleton):
+  """Process-local store of the issuer's signing keys, indexed by key ID.
+
+  Keys are loaded when the app starts and refreshed in the background, so
+  verifying a token never needs a round trip to Redis. Unknown key IDs cause
+  at most one refetch at a time, and no more than one per refetch interval.
+  """
+
+  def init(self, *args, **kwargs):
+    """Start with no keys.
+    """
+
+    self.keys: typing.Dict[str, dict] = {}
+    self._lock: asyncio.Lock = None
+    self._task: asyncio.Task = None
+    self._last_refetch = 0.0
+
+  async def initialize(self):
+    """Load the keys and start refreshing them in the background.
+    """
+
+    self._lock = asyncio.Lock()
+    try:
+      await self.load(from_cache=True)
+    except:
+      # Keys will be fetched on demand once the issuer is reachable.
+      sentry_sdk.capture_exception()
+    self._task = asyncio.create_task(self._refresh())
+
+  async def close(self):
+    """Stop refreshing the keys.
+    """
+
+    if self._task:
+      self._task.cancel()
+      try:
+        await self._task
+      except asyncio.CancelledError:
+        pass
+      self._task = None
+
+  async def load(self, from_cache: bool = True):
+    """Replace the stored keys with the current JSON Web Key Set.
+    """
+
+    jwks = await _get_keys(from_cache=from_cache)
+    self.keys = {key["kid"]: _parse_key(key) for key in jwks["keys"]}
+
+  async def get(self, kid: str) -> typing.Union[dict, None]:
+    """Get the signing key for a key ID.
+    """
+
+    key = self.keys.get(kid)
+    if key or not kid:
+      return key
+
+    if not self._lock:
+      self._lock = asyncio.Lock()
+
+    async with self._lock:
+      # Another request may have fetched the key while we were waiting.
+      key = self.keys.get(kid)
+      if key:
+        return key
+
+      # Don't let a flood of bad tokens hammer the JWKS endpoint.
+      if time.monotonic() - self._last_refetch < _JWKS_REFETCH_INTERVAL:
+        return None
+      self._last_refetch = time.monotonic()
+
+      # Get a fresh set of keys just in case we just missed a new sign.
+      await self.load(from_cache=False)
+
+    return self.keys.get(kid)
+
+  async def _refresh(self):
+    """Periodically reload the keys for as long as the app runs.
+    """
+
+    while True:
+      await asyncio.sleep(_JWKS_REFRESH_INTERVAL)
+      try:
+        await self.load(from_cache=True)
+      except:
+        sentry_sdk.capture_exception()
+
+
+class AuthMiddleware:
   """Ensures that clients are authorized before accessing routes.
+
+  Implemented as a plain ASGI middleware, so responses from the underlying
+  app are passed straight through instead of being wrapped in an extra task
+  and memory stream.
   """
 
-  async def dispatch(
-    self,
-    request: Request,
-    call_next: typing.Callable,
-  ) -> Response:
-    """Code to run when the middleware is dispatched.
+  def __init__(self, app: ASGIApp, public_paths: typing.Iterable[str] = ()):
+    self.app = app
+    self.public_paths = frozenset(public_paths)
+
+  async def __call__(self, scope: Scope, receive: Receive, send: Send):
+    """Code to run when the middleware is called.
+    """
+
+    # Only HTTP requests to non-public paths need to be authorized.
+    if scope["type"] != "http" or scope["path"] in self.public_paths:
+      await self.app(scope, receive, send)
+      return
+
+    # Return the error response if the client is not authorized.
+    response = await self.authorize(Request(scope))
+    if response:
+      await response(scope, receive, send)
+      return
+
+    # Run the underlying endpoint.
+    await self.app(scope, receive, send)
+
+  async def authorize(self, request: Request) -> typing.Union[Response, None]:
+    """Bind the user to the request state, or return an error response.
     """
 
     # Get the Authorization header.
@@ -213,48 +548,45 @@ class AuthMiddleware(BaseHTTPMiddleware):
 
     # Return an error if there is no Authorization header.
     if not header:
-      return JSONResponse(
+      return ORJSONResponse(
         {"message": "Missing Authorization header."},
         status_code=401,
       )
 
     # Return an error if the token is not of Bearer type.
     if not header.startswith("Bearer "):
-      return JSONResponse(
+      return ORJSONResponse(
         {"message": "Malformed Authorization header."},
         status_code=400,
       )
 
     token = header[7:]
 
-    # Fetch keys from JSON Web Key Set.
-    jwks = await _get_keys(from_cache=True)
+    # Skip signature verification for tokens that were verified before.
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    user = token_cache.get(digest)
+    if user:
+      request.state.user = user
+      return None
 
     # Get the token header without verifying it.
     try:
       unverified_header = jwt.get_unverified_header(token)
     except exceptions.JWTError:
-      return JSONResponse(
+      return ORJSONResponse(
         {"message": "Error decoding authorization token headers"},
         status_code=400,
       )
 
-    # For every key that our issuer has signed with previously...
-    rsa_key = _find_matching_key(unverified_header["kid"], jwks["keys"])
+    # Find the key our issuer signed the token with.
+    rsa_key = await KeyStore().get(unverified_header.get("kid"))
 
     # Return error if there's no matching signing key.
     if not rsa_key:
-      # Get a fresh set of keys just in case we just missed a new sign.
-      jwks = await _get_keys(from_cache=False)
-      # Attempt to find key again.
-      rsa_key = _find_matching_key(unverified_header["kid"], jwks["keys"])
-      # If we still don't have a matching key.
-      if not rsa_key:
-        # Return an error.
-        return JSONResponse(
-          {"message": "Invalid authorization token."},
-          status_code=401,
-        )
+      return ORJSONResponse(
+        {"message": "Invalid authorization token."},
+        status_code=401,
+      )
 
     # Attempt to validate and parse out user data from the token.
     user = None
@@ -268,25 +600,27 @@ class AuthMiddleware(BaseHTTPMiddleware):
         issuer=f"https://{_BASE_URL}/")
     except jwt.ExpiredSignatureError:
       # Return error if the token expired.
-      return JSONResponse(
+      return ORJSONResponse(
         {"message": "Authorization token is expired"},
         status_code=401,
       )
     except jwt.JWTClaimsError:
       # Return error if the claims are missing or invalid.
-      return JSONResponse(
+      return ORJSONResponse(
         {"message": "Incorrect claims in authorization token"},
         status_code=401,
       )
     except:
       # Return error if anything else went wrong.
-      return JSONResponse(
+      return ORJSONResponse(
         {"message": "Unable to parse authorization token."},
         status_code=401,
       )
 
+    # Remember the verified claims until the token expires.
+    token_cache.set(digest, user, expires_at=user.get("exp"))
+
     # Bind the user to the request state.
     request.state.user = user
 
-    # Run the underlying endpoint.
-    return await call_next(request)
+    return None
@@ -0,0 +1,210 @@
+"""Caching utilities.
+"""
+
+import time
+import typing
+from collections import OrderedDict
+
+import orjson
+
+from app.utils.redis import Redis
+
+
+class LRUCache:
+  """Bounded in-memory cache with least-recently-used eviction.
+
+  Every entry can carry its own expiry timestamp, after which it is treated as
+  missing. Hits and misses are counted so the cache can be observed.
+  """
+
+  def __init__(self, maxsize: int = 1024, ttl: float = None):
+    self.maxsize = maxsize
+    self.ttl = ttl
+    self.hits = 0
+    self.misses = 0
+    self._entries: "OrderedDict[typing.Hashable, tuple]" = OrderedDict()
+
+  def __len__(self) -> int:
+    return len(self._entries)
+
+  def get(self, key: typing.Hashable, default: typing.Any = None):
+    """Get a value from the cache, or the default if missing or expired.
+    """
+
+    entry = self._entries.get(key)
+    if entry is None:
+      self.misses += 1
+      return default
+
+    value, expires_at = entry
+    if expires_at is not None and expires_at <= time.time():
+      del self._entries[key]
+      self.misses += 1
+      return default
+
+    self._entries.move_to_end(key)
+    self.hits += 1
+    return value
+
+  def set(
+    self,
+    key: typing.Hashable,
+    value: typing.Any,
+    expires_at: float = None,
+  ) -> None:
+    """Store a value, evicting the least recently used entries when full.
+
+    Entries without an explicit expiry timestamp fall back on the cache TTL.
+    """
+
+    if expires_at is None and self.ttl is not None:
+      expires_at = time.time() + self.ttl
+
+    self._entries[key] = (value, expires_at)
+    self._entries.move_to_end(key)
+    while len(self._entries) > self.maxsize:
+      self._entries.popitem(last=False)
+
+  def delete(self, key: typing.Hashable) -> None:
+    """Remove a value from the cache if it is present.
+    """
+
+    self._entries.pop(key, None)
+
+  def clear(self) -> None:
+    """Remove every value from the cache.
+    """
+
+    self._entries.clear()
+
+  def stats(self) -> dict:
+    """Current size and hit/miss counters of the cache.
+    """
+
+    lookups = self.hits + self.misses
+    return {
+      "size": len(self._entries),
+      "maxsize": self.maxsize,
+      "hits": self.hits,
+      "misses": self.misses,
+      "hit_rate": self.hits / lookups if lookups else 0.0,
+    }
+
+
+class ReadThroughCache:
+  """Two-tier cache of serialized resources.
+
+  Lookups try a small in-process cache first, then Redis, and only then load
+  the resource with `loader`, storing the result in both tiers. The
+  in-process tier is not invalidated across instances of the app, so it
+  keeps entries for a few seconds only.
+  """
+
+  def __init__(
+    self,
+    namespace: str,
+    loader: typing.Callable[[typing.Any], typing.Awaitable[dict]],
+    many_loader: typing.Callable[[typing.List], typing.Awaitable[dict]] = None,
+    ttl: int = 300,
+    local_ttl: float = 5,
+  ):
+    self.namespace = namespace
+    self.loader = loader
+    self.many_loader = many_loader
+    self.ttl = ttl
+    self.local = LRUCache(maxsize=1024, ttl=local_ttl)
+
+  def _key(self, key: typing.Any) -> str:
+    return f"{self.namespace}:{key}"
+
+  async def get(self, key: typing.Any) -> typing.Union[dict, None]:
+    """Get a serialized resource, loading it if it isn't cached.
+    """
+
+    value = self.local.get(key)
+    if value is not None:
+      return value
+
+    redis = Redis().connection
+
+    raw = await redis.get(self._key(key))
+    if raw is None:
+      value = await self.loader(key)
+      if value is None:
+        return None
+      raw = orjson.dumps(value)
+      await redis.set(self._key(key), raw, expire=self.ttl)
+
+    # Both tiers hold the same JSON-compatible form of the resource.
+    value = orjson.loads(raw)
+    self.local.set(key, value)
+    return value
+
+  async def get_many(
+    self,
+    keys: typing.Iterable[typing.Any],
+  ) -> typing.Dict[typing.Any, dict]:
+    """Get many serialized resources at once, keyed by their keys.
+
+    Costs at most one Redis read, one load of every missing resource and one
+    Redis write. Resources that can't be found are left out of the result.
+    """
+
+    values = {}
+    missing = []
+    for key in dict.fromkeys(keys):
+      value = self.local.get(key)
+      if value is not None:
+        values[key] = value
+      else:
+        missing.append(key)
+
+    if missing:
+      for key, raw in (await self._get_many_raw(missing)).items():
+        values[key] = orjson.loads(raw)
+        self.local.set(key, values[key])
+
+    return values
+
+  async def _get_many_raw(
+    self,
+    keys: typing.List[typing.Any],
+  ) -> typing.Dict[typing.Any, typing.Union[str, bytes]]:
+    """Get many encoded resources from Redis, loading whatever is missing.
+    """
+
+    redis = Redis().connection
+
+    # Read every resource from Redis in one round trip.
+    raws = {}
+    unloaded = []
+    for key, raw in zip(keys, await redis.mget(*map(self._key, keys))):
+      if raw is not None:
+        raws[key] = raw
+      else:
+        unloaded.append(key)
+
+    if not unloaded:
+      return raws
+
+    # Load whatever Redis doesn't have, and store it in one round trip.
+    if self.many_loader:
+      loaded = await self.many_loader(unloaded)
+    else:
+      loaded = {key: await self.loader(key) for key in unloaded}
+    loaded = {key: value for key, value in loaded.items() if value is not None}
+    if loaded:
+      pipeline = redis.pipeline()
+      for key, value in loaded.items():
+        raws[key] = orjson.dumps(value)
+        pipeline.set(self._key(key), raws[key], expire=self.ttl)
+      await pipeline.execute()
+
+    return raws
+
+  async def invalidate(self, key: typing.Any):
+    """Drop a serialized resource from both tiers.
+    """
+
+    self.local.delete(key)
+    await Redis().connection.delete(self._key(key))
@@ -0,0 +1,112 @@
+"""Request coalescing utilities.
+"""
+
+import time
+import typing
+import asyncio
+
+from app.utils.redis import Redis, acquire_lock, release_lock
+
+
+class SingleFlight:
+  """Make sure only one call per key is in flight at a time.
+
+  Concurrent callers asking for the same key share the result of the call
+  that is already running. When distributed, a Redis lock extends this across
+  every instance of the app: callers that lose the lock poll with `recheck`
+  until the lock holder has stored its result, and only run the call
+  themselves if that takes longer than the lock timeout.
+  """
+
+  def __init__(
+    self,
+    distributed: bool = False,
+    lock_timeout: float = 5,
+    poll_interval: float = 0.05,
+  ):
+    self.distributed = distributed
+    self.lock_timeout = lock_timeout
+    self.poll_interval = poll_interval
+    self._calls: typing.Dict[str, asyncio.Future] = {}
+
+  async def do(
+    self,
+    key: str,
+    func: typing.Callable[[], typing.Awaitable],
+    recheck: typing.Callable[[], typing.Awaitable] = None,
+  ) -> typing.Any:
+    """Run `func` unless a call for the same key is already in flight.
+    """
+
+    future = self._calls.get(key)
+    if future is None:
+      if self.distributed and recheck:
+        future = asyncio.ensure_future(self._locked(key, func, recheck))
+      else:
+        future = asyncio.ensure_future(func())
+      self._calls[key] = future
+      future.add_done_callback(lambda _: self._calls.pop(key, None))
+
+    # A cancelled caller must not cancel the call other callers wait on.
+    return await asyncio.shield(future)
+
+  async def do_many(
+    self,
+    keys: typing.List[str],
+    func: typing.Callable[[typing.List[str]], typing.Awaitable[dict]],
+  ) -> dict:
+    """Run `func` once for every key that isn't already in flight.
+
+    `func` gets the keys to run for in one batch, and returns results by key.
+    Keys it has no result for resolve to None. Callers of `do` and `do_many`
+    for a key of the batch share its result, within this instance of the
+    app only.
+    """
+
+    pending = [key for key in keys if key not in self._calls]
+    if pending:
+      batch = asyncio.ensure_future(func(pending))
+      for key in pending:
+        future = asyncio.ensure_future(self._pick(batch, key))
+        self._calls[key] = future
+        future.add_done_callback(lambda _, key=key: self._calls.pop(key, None))
+
+    futures = [self._calls[key] for key in keys]
+    # A cancelled caller must not cancel the calls other callers wait on.
+    results = await asyncio.gather(*map(asyncio.shield, futures))
+    return dict(zip(keys, results))
+
+  @staticmethod
+  async def _pick(batch: asyncio.Future, key: str) -> typing.Any:
+    """Get the result for one key out of the results of a batch.
+    """
+
+    return (await batch).get(key)
+
+  async def _locked(
+    self,
+    key: str,
+    func: typing.Callable[[], typing.Awaitable],
+    recheck: typing.Callable[[], typing.Awaitable],
+  ) -> typing.Any:
+    """Run `func` while holding a lock shared by every instance of the app.
+    """
+
+    redis = Redis().connection
+
+    token = await acquire_lock(redis, key, self.lock_timeout)
+    if token:
+      try:
+        return await func()
+      finally:
+        await release_lock(redis, key, token)
+
+    # Another instance is running the call, wait for it to store the result.
+    deadline = time.monotonic() + self.lock_timeout
+    while time.monotonic() < deadline:
+      await asyncio.sleep(self.poll_interval)
+      result = await recheck()
+      if result is not None:
+        return result
+
+    return await func()
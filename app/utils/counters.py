@@ -0,0 +1,147 @@
+"""Counter utilities.
+
+The number of meanings of every quote is a column of the quote, incremented
+in the same statement that creates a meaning, so it comes with the quote for
+free. The number of quotes of every author is mirrored into a Redis hash, as
+authors aren't stored in the database. Authors missing from the hash are
+counted from the database the first time they are read.
+
+A count loaded from the database is only stored if the count didn't change
+while it was loaded. Still, a quote created right before a count is loaded
+but mirrored right after it is stored is counted twice, so the counters
+should be repaired regularly, like daily from cron, by running this module:
+`python -m app.utils.counters`.
+"""
+
+import asyncio
+import secrets
+import typing
+
+from tortoise import Tortoise
+
+from app.utils.redis import Redis, run_script
+from app.models import Quote
+
+# Hash of the number of quotes of every author, by user ID. Counts that
+# changed before they were loaded also have a `<user ID>:changed` field.
+_QUOTE_COUNTS_KEY = "philosopher:counts:quotes"
+
+# Change a count only if it was already loaded, so counts that are missing
+# are still counted from the database rather than starting from zero.
+# Otherwise mark the count as changed, with a token unique to this change.
+_INCREMENT_SCRIPT = """
+if redis.call("HEXISTS", KEYS[1], ARGV[1]) == 1 then
+  return redis.call("HINCRBY", KEYS[1], ARGV[1], ARGV[2])
+end
+redis.call("HSET", KEYS[1], ARGV[1] .. ":changed", ARGV[3])
+return nil
+"""
+
+# Store a count loaded from the database, unless the count changed since it
+# started loading, going by the token it was marked with then. Returns 1 if
+# the count was stored.
+_FILL_SCRIPT = """
+local changed = redis.call("HGET", KEYS[1], ARGV[1] .. ":changed") or ""
+if changed ~= ARGV[3] then
+  return 0
+end
+redis.call("HSETNX", KEYS[1], ARGV[1], ARGV[2])
+redis.call("HDEL", KEYS[1], ARGV[1] .. ":changed")
+return 1
+"""
+
+
+async def count_quote(author_id: str, amount: int = 1):
+  """Change the number of quotes of an author.
+  """
+
+  await run_script(
+    Redis().connection,
+    _INCREMENT_SCRIPT,
+    keys=[_QUOTE_COUNTS_KEY],
+    args=[author_id, amount, secrets.token_hex(8)],
+  )
+
+
+async def get_quote_count(author_id: str) -> int:
+  """Get the number of quotes of an author.
+  """
+
+  redis = Redis().connection
+  count, changed = await redis.hmget(_QUOTE_COUNTS_KEY, author_id,
+                                     f"{author_id}:changed")
+  if count is not None:
+    return int(count)
+
+  count = await Quote.filter(author=author_id).count()
+  await run_script(
+    redis,
+    _FILL_SCRIPT,
+    keys=[_QUOTE_COUNTS_KEY],
+    args=[author_id, count, changed or ""],
+  )
+  return count
+
+
+async def reconcile_meaning_counts() -> typing.List[int]:
+  """Recount the meanings of every quote in one statement.
+
+  Counts are corrected by how far they were off, rather than overwritten, so
+  meanings created while recounting are still counted. Returns the IDs of the
+  quotes whose count was wrong.
+  """
+
+  _, rows = await Tortoise.get_connection("default").execute_query(
+    'UPDATE "quote" '
+    'SET "meaning_count" = "quote"."meaning_count" '
+    '+ "counts"."count" - "counts"."seen" FROM ('
+    'SELECT "quote"."id", "quote"."meaning_count" AS "seen", '
+    'COUNT("meaning"."id") AS "count" FROM "quote" '
+    'LEFT JOIN "meaning" ON "meaning"."quote_id" = "quote"."id" '
+    'GROUP BY "quote"."id"'
+    ') AS "counts" '
+    'WHERE "quote"."id" = "counts"."id" '
+    'AND "counts"."seen" <> "counts"."count" '
+    'RETURNING "quote"."id"')
+  return [row["id"] for row in rows]
+
+
+async def reconcile_quote_counts():
+  """Forget the number of quotes of every author.
+
+  Counts are then loaded again from the database as they are read, guarded
+  against concurrent changes like any other, so no change is lost.
+  """
+
+  await Redis().connection.delete(_QUOTE_COUNTS_KEY)
+
+
+async def reconcile():
+  """Repair every counter, connecting to the database and Redis first.
+  """
+
+  # pylint: disable=import-outside-toplevel,cyclic-import
+  from app import settings
+  from app.caches import quote_cache
+
+  redis = Redis()
+  await redis.initialize(url=settings.REDIS_URL)
+  await Tortoise.init(config=settings.TORTOISE_ORM)
+
+  try:
+    quote_ids = await reconcile_meaning_counts()
+    # Cached quotes hold their number of meanings too.
+    for quote_id in quote_ids:
+      await quote_cache.invalidate(quote_id)
+    print(f"Repaired the number of meanings of {len(quote_ids)} quotes.")
+
+    await reconcile_quote_counts()
+    print("Cleared the number of quotes of every author, to be recounted.")
+  finally:
+    await Tortoise.close_connections()
+    redis.connection.close()
+    await redis.connection.wait_closed()
+
+
+if __name__ == "__main__":
+  asyncio.run(reconcile())
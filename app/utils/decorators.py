@@ -1,33 +1,85 @@
 """Endpoint decorators.
 """
 
+import math
+import inspect
 import typing
 from functools import wraps
 
+import orjson
 from starlette.requests import Request
-from starlette.responses import JSONResponse
+from starlette.responses import Response
 from tortoise.models import Model
 from typesystem.schemas import Schema
 
 from app.models import Author, Meaning
-from app.utils import auth
+from app.utils import auth, config
+from app.utils.pagination import (
+  Page,
+  InvalidCursorError,
+  decode_cursor,
+  decode_id_cursor,
+  decode_rank_cursor,
+)
+from app.utils.cache import ReadThroughCache
+from app.utils.friends import get_friends
+from app.utils.redis import Redis, take_token
+from app.utils.responses import ORJSONResponse, compute_etag, is_not_modified
+from app.utils.validation import CompiledSchema, read_body
+
+# Largest number of rows a client may ask for in one page.
+_MAX_PAGE_COUNT = config("MAX_PAGE_COUNT", cast=int, default=50)
 
 
 def use_user(func: typing.Coroutine) -> typing.Coroutine:
-  """Wrapper that sends off rich user data to the underlying endpoint.
+  """Wrapper that sends off the requesting user to the underlying endpoint.
+
+  The user is built from the token claims alone, so it has no profile fields.
+  Endpoints that need them get the user with `auth.get_user` or
+  `auth.get_users` instead.
   """
 
+  @wraps(func)
   async def inner(request: Request, *args, **kwargs):
     # Grab Auth0 ID from request state.
-    user_id = request.state.user["sub"]
-    # Get user profile information.
-    user = await auth.get_user(user_id=user_id)
+    user = Author(user_id=request.state.user["sub"])
     # Run the underlying endpoint, passing down the user.
     return await func(request, *args, user=user, **kwargs)
 
   return inner
 
 
+def use_friends(func: typing.Coroutine) -> typing.Coroutine:
+  """Wrapper that sends off the IDs of the friends of the requesting user.
+
+  Needs the user exposed by `use_user`.
+  """
+
+  @wraps(func)
+  async def inner(request: Request, *args, **kwargs):
+    user: Author = kwargs["user"]
+    friend_ids = await get_friends(user.user_id)
+    return await func(request, *args, friends=friend_ids, **kwargs)
+
+  return inner
+
+
+def use_counts(key: str):
+  """Wrapper that loads the counters of a resource exposed as keyword argument.
+  """
+
+  def wrapper(func: typing.Coroutine):
+
+    @wraps(func)
+    async def wrapped(request: Request, *args, **kwargs):
+      await kwargs[key].load_counts()
+      return await func(request, *args, **kwargs)
+
+    return wrapped
+
+  return wrapper
+
+
 def use_path_model(model: Model, path_key: str = "model_id"):
   """Wrapper that exposes a model from request path.
   """
@@ -46,7 +98,7 @@ def use_path_model(model: Model, path_key: str = "model_id"):
         instance = None
 
       if not instance:
-        return JSONResponse(
+        return ORJSONResponse(
           {
             "message": "Not found.",
           },
@@ -63,18 +115,90 @@ def use_path_model(model: Model, path_key: str = "model_id"):
   return wrapper
 
 
+def use_cached(cache: ReadThroughCache, path_key: str = "model_id"):
+  """Wrapper that exposes a serialized resource from request path.
+
+  The resource is read through the cache, so the keyword argument is the
+  serialized dictionary rather than a model instance.
+  """
+
+  def wrapper(func: typing.Coroutine):
+
+    @wraps(func)
+    async def wrapped(request: Request, *args, **kwargs):
+      try:
+        instance_pk = int(request.path_params[path_key])
+      except ValueError:
+        instance_pk = None
+
+      instance = await cache.get(instance_pk) if instance_pk else None
+
+      if not instance:
+        return ORJSONResponse(
+          {
+            "message": "Not found.",
+          },
+          status_code=404,
+        )
+      kwargs[cache.namespace] = instance
+      return await func(request, *args, **kwargs)
+
+    return wrapped
+
+  return wrapper
+
+
+def use_etag(key: str, *fields: str):
+  """Wrapper that answers conditional requests for a resource.
+
+  The entity tag is computed from the given fields of the resource exposed as
+  keyword argument, so unchanged resources are answered with 304 before the
+  endpoint serializes anything.
+  """
+
+  def wrapper(func: typing.Coroutine):
+
+    @wraps(func)
+    async def wrapped(request: Request, *args, **kwargs):
+      resource = kwargs[key]
+      if isinstance(resource, dict):
+        etag = compute_etag(*[resource.get(field) for field in fields])
+      else:
+        etag = compute_etag(*[getattr(resource, field) for field in fields])
+
+      if is_not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+      response = await func(request, *args, **kwargs)
+      response.headers["ETag"] = etag
+      return response
+
+    return wrapped
+
+  return wrapper
+
+
 def restrict(*check_functions: typing.Iterable[typing.Callable[..., bool]],
              assertion: bool = True) -> typing.Callable:
   """Wrap an endpiont with some sort of restriction.
+
+  Checks run in order until one passes, so cheap checks should come first.
+  Checks may be coroutine functions, for those that need a lookup.
   """
 
   def wrapper(func: typing.Coroutine) -> typing.Coroutine:
 
     @wraps(func)
-    async def wrapped(request: Request, *args, **kwargs) -> JSONResponse:
-      results = [fun(*args, **kwargs) for fun in check_functions]
-      if any(results) is not assertion:
-        return JSONResponse(
+    async def wrapped(request: Request, *args, **kwargs) -> ORJSONResponse:
+      passed = False
+      for fun in check_functions:
+        passed = fun(*args, **kwargs)
+        if inspect.isawaitable(passed):
+          passed = await passed
+        if passed:
+          break
+      if bool(passed) is not assertion:
+        return ORJSONResponse(
           {
             "message": "Forbidden.",
           },
@@ -87,29 +211,77 @@ def restrict(*check_functions: typing.Iterable[typing.Callable[..., bool]],
   return wrapper
 
 
+def rate_limit(name: str, limit: int, period: float):
+  """Wrapper that limits how often each user can call an endpoint.
+
+  Users can make `limit` calls in a burst, refilled evenly over `period`
+  seconds, counted across every instance of the app.
+  """
+
+  rate = limit / period
+
+  def wrapper(func: typing.Coroutine) -> typing.Coroutine:
+
+    @wraps(func)
+    async def wrapped(request: Request, *args, **kwargs):
+      user_id = request.state.user["sub"]
+      wait = await take_token(
+        Redis().connection,
+        f"{name}:{user_id}",
+        capacity=limit,
+        rate=rate,
+      )
+      if wait:
+        return ORJSONResponse(
+          {
+            "message": "Too many requests.",
+          },
+          status_code=429,
+          headers={"Retry-After": str(math.ceil(wait))},
+        )
+      return await func(request, *args, **kwargs)
+
+    return wrapped
+
+  return wrapper
+
+
 def validate_body(schema: Schema):
   """Wrapper that validates and exposes request body as keyword argument.
+
+  The schema is compiled once here, and bodies too large to ever be valid are
+  rejected before they are parsed.
   """
 
+  compiled = CompiledSchema(schema)
+
   def wrapper(func: typing.Coroutine):
 
     @wraps(func)
     async def wrapped(request: Request, *args, **kwargs):
+      body = await read_body(request, limit=compiled.max_size)
+      if body is None:
+        return ORJSONResponse(
+          {
+            "message": "Request body too large.",
+          },
+          status_code=413,
+        )
       try:
-        data = await request.json()
+        data = orjson.loads(body)
       except:
-        return JSONResponse(
+        return ORJSONResponse(
           {
             "message": "Missing or invalid request body.",
           },
           status_code=400,
         )
-      validated, errors = schema.validate_or_error(data)
+      validated, errors = compiled.validate_or_error(data)
       if errors:
-        return JSONResponse(
+        return ORJSONResponse(
           {
             "message": "Failed validation.",
-            "result": dict(errors),
+            "result": errors,
           },
           status_code=400,
         )
@@ -118,3 +290,89 @@ def validate_body(schema: Schema):
     return wrapped
 
   return wrapper
+
+
+def _get_page(
+  request: Request,
+  decode: typing.Callable[[str], tuple],
+) -> typing.Union[Page, ORJSONResponse]:
+  """Parse pagination query parameters, or return an error response.
+  """
+
+  try:
+    count = int(request.query_params.get("count", default=10))
+  except ValueError:
+    return ORJSONResponse(
+      {
+        "message": "Query parameter 'count' must be an integer.",
+      },
+      status_code=400,
+    )
+
+  if count < 1:
+    return ORJSONResponse(
+      {
+        "message": "Query parameter 'count' must be greater than 1.",
+      },
+      status_code=400,
+    )
+
+  cursor = request.query_params.get("cursor")
+  try:
+    after = decode(cursor) if cursor else None
+  except InvalidCursorError:
+    return ORJSONResponse(
+      {
+        "message": "Query parameter 'cursor' is invalid.",
+      },
+      status_code=400,
+    )
+
+  return Page(count=min(count, _MAX_PAGE_COUNT), after=after)
+
+
+def use_page(func: typing.Coroutine) -> typing.Coroutine:
+  """Wrapper that exposes pagination query parameters as keyword argument.
+  """
+
+  @wraps(func)
+  async def wrapped(request: Request, *args, **kwargs):
+    page = _get_page(request, decode_cursor)
+    if not isinstance(page, Page):
+      return page
+    return await func(request, *args, page=page, **kwargs)
+
+  return wrapped
+
+
+def use_ranked_page(func: typing.Coroutine) -> typing.Coroutine:
+  """Wrapper that exposes pagination query parameters of ranked results.
+
+  Like `use_page`, except that cursors hold the rank of a row instead of its
+  publication time.
+  """
+
+  @wraps(func)
+  async def wrapped(request: Request, *args, **kwargs):
+    page = _get_page(request, decode_rank_cursor)
+    if not isinstance(page, Page):
+      return page
+    return await func(request, *args, page=page, **kwargs)
+
+  return wrapped
+
+
+def use_id_page(func: typing.Coroutine) -> typing.Coroutine:
+  """Wrapper that exposes pagination query parameters of rows ordered by ID.
+
+  Like `use_page`, except that cursors hold only the ID of a row.
+  """
+
+  @wraps(func)
+  async def wrapped(request: Request, *args, **kwargs):
+    page = _get_page(request, decode_id_cursor)
+    if not isinstance(page, Page):
+      return page
+    return await func(request, *args, page=page, **kwargs)
+
+  return wrapped
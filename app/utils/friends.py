@@ -0,0 +1,160 @@
+"""Friendship utilities.
+
+Friendships are stored in the database, and mirrored into a Redis set of
+friend IDs per user, so checking and listing friends costs no joins. A set
+holds an empty marker member once it has been loaded from the database, so
+sets that are missing or only partially written are rebuilt on first use.
+
+Every change to the friends of a user bumps a version, and a set loaded from
+the database is only stored if the version didn't change while it loaded, so
+friendships that end while loading are never written back.
+"""
+
+import typing
+
+from tortoise.query_utils import Q
+
+from app.utils.redis import Redis, run_script
+from app.models import Friendship
+
+# Member of every friend set that has been loaded from the database.
+_LOADED = ""
+
+# Replace a friend set with the friends loaded from the database, unless its
+# version changed since they started loading. Members are added in chunks, as
+# Lua can only unpack so many at once. Returns 1 if the set was stored.
+_STORE_SCRIPT = """
+if (redis.call("GET", KEYS[2]) or "") ~= ARGV[1] then
+  return 0
+end
+redis.call("DEL", KEYS[1])
+for first = 2, #ARGV, 1000 do
+  redis.call("SADD", KEYS[1], unpack(ARGV, first, math.min(first + 999, #ARGV)))
+end
+return 1
+"""
+
+
+def _key(user_id: str) -> str:
+  return f"philosopher:friends:{user_id}"
+
+
+def _version_key(user_id: str) -> str:
+  return f"philosopher:friends:{user_id}:version"
+
+
+async def _load_friends(user_id: str) -> typing.Set[str]:
+  """Load the friend IDs of a user from the database into Redis.
+  """
+
+  redis = Redis().connection
+  version = await redis.get(_version_key(user_id))
+
+  pairs = await Friendship \
+    .filter(Q(requester=user_id) | Q(addressee=user_id), accepted=True) \
+    .values_list("requester", "addressee")
+  friend_ids = {
+    addressee if requester == user_id else requester
+    for requester, addressee in pairs
+  }
+
+  await run_script(
+    redis,
+    _STORE_SCRIPT,
+    keys=[_key(user_id), _version_key(user_id)],
+    args=[version or "", _LOADED, *friend_ids],
+  )
+  return friend_ids
+
+
+async def get_friends(user_id: str) -> typing.Set[str]:
+  """Get the IDs of every friend of a user.
+  """
+
+  members = set(await Redis().connection.smembers(_key(user_id)))
+  if _LOADED not in members:
+    return await _load_friends(user_id)
+
+  members.discard(_LOADED)
+  return members
+
+
+async def count_friends(user_id: str) -> int:
+  """Count the friends of a user, without getting their IDs.
+  """
+
+  pipeline = Redis().connection.pipeline()
+  pipeline.sismember(_key(user_id), _LOADED)
+  pipeline.scard(_key(user_id))
+  loaded, count = await pipeline.execute()
+
+  if not loaded:
+    return len(await _load_friends(user_id))
+  return count - 1
+
+
+async def get_friends_in(user_id: str, key: str) -> typing.Set[str]:
+  """Get the IDs of the friends of a user that are members of another set.
+
+  Costs as much as the smaller of the two sets, however large the other is.
+  """
+
+  redis = Redis().connection
+
+  pipeline = redis.pipeline()
+  pipeline.sismember(_key(user_id), _LOADED)
+  pipeline.sinter(_key(user_id), key)
+  loaded, members = await pipeline.execute()
+
+  if not loaded:
+    friend_ids = list(await _load_friends(user_id))
+    pipeline = redis.pipeline()
+    for friend_id in friend_ids:
+      pipeline.sismember(key, friend_id)
+    members = [
+      friend_id
+      for friend_id, member in zip(friend_ids, await pipeline.execute())
+      if member
+    ]
+
+  return set(members) - {_LOADED}
+
+
+async def are_friends(user_id: str, other_id: str) -> bool:
+  """Check whether two users are friends.
+  """
+
+  pipeline = Redis().connection.pipeline()
+  pipeline.sismember(_key(user_id), _LOADED)
+  pipeline.sismember(_key(user_id), other_id)
+  loaded, member = await pipeline.execute()
+
+  if not loaded:
+    return other_id in await _load_friends(user_id)
+  return bool(member)
+
+
+async def add_friends(user_id: str, other_id: str):
+  """Mirror a new friendship between two users.
+  """
+
+  # Bump the versions first, so sets loading meanwhile aren't stored.
+  pipeline = Redis().connection.pipeline()
+  pipeline.incr(_version_key(user_id))
+  pipeline.incr(_version_key(other_id))
+  pipeline.sadd(_key(user_id), other_id)
+  pipeline.sadd(_key(other_id), user_id)
+  await pipeline.execute()
+
+
+async def remove_friends(user_id: str, other_id: str):
+  """Mirror the end of a friendship between two users.
+  """
+
+  # Bump the versions first, so sets loading meanwhile aren't stored.
+  pipeline = Redis().connection.pipeline()
+  pipeline.incr(_version_key(user_id))
+  pipeline.incr(_version_key(other_id))
+  pipeline.srem(_key(user_id), other_id)
+  pipeline.srem(_key(other_id), user_id)
+  await pipeline.execute()
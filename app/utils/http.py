@@ -0,0 +1,94 @@
+"""HTTP client utilities.
+"""
+
+# pylint: disable=attribute-defined-outside-init
+
+import time
+
+import aiohttp
+
+from app.utils import Singleton
+from app.utils.metrics import Metrics
+
+
+class HTTP(Singleton):
+  """HTTP client session singleton.
+
+  One long-lived session is shared by every outgoing request, so connections
+  to the same host are pooled and kept alive instead of paying for a new TCP
+  and TLS handshake each time.
+  """
+
+  def init(self, *args, **kwargs):
+    """Start with empty session and counters.
+    """
+
+    self.session = None
+    self.requests = 0
+    self.connections_created = 0
+    self.connections_reused = 0
+
+  async def initialize(
+    self,
+    limit: int = 100,
+    keepalive_timeout: float = 30,
+    dns_cache_ttl: int = 300,
+    timeout: float = 10,
+  ):
+    """Initialize the session with this instance method.
+    """
+
+    if not self.session:
+      # Count requests and connections to see how well the pool is reused.
+      trace_config = aiohttp.TraceConfig()
+      trace_config.on_request_start.append(self._on_request_start)
+      trace_config.on_request_end.append(self._on_request_end)
+      trace_config.on_request_exception.append(self._on_request_end)
+      trace_config.on_connection_create_end.append(self._on_connection_create)
+      trace_config.on_connection_reuseconn.append(self._on_connection_reuse)
+
+      connector = aiohttp.TCPConnector(
+        limit=limit,
+        keepalive_timeout=keepalive_timeout,
+        use_dns_cache=True,
+        ttl_dns_cache=dns_cache_ttl,
+      )
+      self.session: aiohttp.ClientSession = aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=timeout),
+        trace_configs=[trace_config],
+      )
+
+  async def close(self):
+    """Close the session and every pooled connection.
+    """
+
+    if self.session:
+      await self.session.close()
+      self.session = None
+
+  def stats(self) -> dict:
+    """Pool configuration and connection reuse counters.
+    """
+
+    connector = self.session.connector if self.session else None
+    return {
+      "limit": connector.limit if connector else 0,
+      "requests": self.requests,
+      "connections_created": self.connections_created,
+      "connections_reused": self.connections_reused,
+    }
+
+  async def _on_request_start(self, _session, context, _params):
+    self.requests += 1
+    context.started = time.perf_counter()
+
+  async def _on_request_end(self, _session, context, params):
+    Metrics().observe_call("http", params.url.host,
+                           time.perf_counter() - context.started)
+
+  async def _on_connection_create(self, *_args):
+    self.connections_created += 1
+
+  async def _on_connection_reuse(self, *_args):
+    self.connections_reused += 1
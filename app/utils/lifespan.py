@@ -9,11 +9,16 @@ from tortoise import Tortoise
 from starlette.applications import Starlette
 
 from app.utils.redis import Redis
+from app.utils.http import HTTP
+from app.utils.auth import KeyStore
+from app.utils.qotd import Rollover
+from app.utils.metrics import instrument_database
 
 
 def get_lifespan(
   sentry_dsn: str,
   redis_url: str,
+  http_config: dict,
   tortoise_config: dict,
 ) -> typing.AsyncGenerator:
   """Generator to return a lifespan function.
@@ -35,16 +40,38 @@ def get_lifespan(
     redis = Redis()
     await redis.initialize(url=redis_url)
 
+    # Create the shared HTTP client session.
+    http = HTTP()
+    await http.initialize(**http_config)
+
+    # Load the signing keys and keep them fresh in the background.
+    keys = KeyStore()
+    await keys.initialize()
+
     # Create the database connection.
     await Tortoise.init(config=tortoise_config)
+    instrument_database(Tortoise.get_connection("default"))
+
+    # Persist the Quote of the Day once every day is over.
+    rollover = Rollover()
+    await rollover.initialize()
 
     # Yield as the app runs.
     yield
 
+    # Stop rolling over days.
+    await rollover.close()
+
+    # Stop refreshing the signing keys.
+    await keys.close()
+
     # Close the Redis connection once the app is shutting down.
     redis.connection.close()
     await redis.connection.wait_closed()
 
+    # Close the HTTP client session and its pooled connections.
+    await http.close()
+
     # Close the Tortoise connection.
     await Tortoise.close_connections()
 
@@ -0,0 +1,223 @@
+"""Metrics utilities.
+"""
+
+# pylint: disable=attribute-defined-outside-init
+
+import time
+import typing
+import bisect
+from functools import wraps
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.utils import Singleton
+
+# Upper bounds in seconds of the request latency histogram buckets.
+_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Query methods of Tortoise connections that talk to the database.
+_QUERY_METHODS = (
+  "execute_query",
+  "execute_query_dict",
+  "execute_insert",
+  "execute_many",
+  "execute_script",
+)
+
+
+class Histogram:
+  """Distribution of observed values over fixed buckets.
+  """
+
+  __slots__ = ("counts", "sum", "count")
+
+  def __init__(self):
+    self.counts = [0] * (len(_BUCKETS) + 1)
+    self.sum = 0.0
+    self.count = 0
+
+  def observe(self, value: float):
+    """Count a value in the bucket it falls in.
+    """
+
+    self.counts[bisect.bisect_left(_BUCKETS, value)] += 1
+    self.sum += value
+    self.count += 1
+
+
+class Metrics(Singleton):
+  """Metrics singleton.
+
+  Collects request latencies and the number and duration of calls to Redis,
+  HTTP services and the database, and renders them in the Prometheus text
+  format. Observing a value only updates a couple of numbers in memory, so it
+  is cheap enough to leave on in production.
+  """
+
+  def init(self, *args, **kwargs):
+    """Start with no observations.
+    """
+
+    self.requests: typing.Dict[typing.Tuple[str, str, int], Histogram] = {}
+    self.calls: typing.Dict[typing.Tuple[str, str], typing.List[float]] = {}
+
+  def observe_request(
+    self,
+    method: str,
+    route: str,
+    status: int,
+    seconds: float,
+  ):
+    """Record how long a request took.
+    """
+
+    key = (method, route, status)
+    histogram = self.requests.get(key)
+    if histogram is None:
+      histogram = self.requests[key] = Histogram()
+    histogram.observe(seconds)
+
+  def observe_call(self, system: str, operation: str, seconds: float):
+    """Record how long a call to Redis, a HTTP service or the database took.
+    """
+
+    key = (system, operation)
+    totals = self.calls.get(key)
+    if totals is None:
+      totals = self.calls[key] = [0, 0.0]
+    totals[0] += 1
+    totals[1] += seconds
+
+  def render(self) -> str:
+    """Render every metric in the Prometheus text format.
+    """
+
+    lines = [
+      "# HELP philosopher_request_duration_seconds Request latency.",
+      "# TYPE philosopher_request_duration_seconds histogram",
+    ]
+    for (method, route, status), histogram in self.requests.items():
+      labels = f'method="{method}",route="{route}",status="{status}"'
+      cumulative = 0
+      for bound, count in zip(_BUCKETS + ("+Inf",), histogram.counts):
+        cumulative += count
+        lines.append("philosopher_request_duration_seconds_bucket"
+                     f'{{{labels},le="{bound}"}} {cumulative}')
+      lines.append(f"philosopher_request_duration_seconds_sum{{{labels}}} "
+                   f"{histogram.sum}")
+      lines.append(f"philosopher_request_duration_seconds_count{{{labels}}} "
+                   f"{histogram.count}")
+
+    lines.extend([
+      "# HELP philosopher_calls_total Calls to backing services.",
+      "# TYPE philosopher_calls_total counter",
+    ])
+    for (system, operation), (count, _) in self.calls.items():
+      lines.append(f'philosopher_calls_total{{system="{system}",'
+                   f'operation="{operation}"}} {count}')
+
+    lines.extend([
+      "# HELP philosopher_call_duration_seconds_total Time spent in calls " \
+      "to backing services.",
+      "# TYPE philosopher_call_duration_seconds_total counter",
+    ])
+    for (system, operation), (_, seconds) in self.calls.items():
+      lines.append(
+        f'philosopher_call_duration_seconds_total{{system="{system}",'
+        f'operation="{operation}"}} {seconds}')
+
+    return "\n".join(lines) + "\n"
+
+
+def render_stats(name: str, stats: typing.Dict[str, float]) -> str:
+  """Render counters from a stats dictionary as Prometheus gauges.
+  """
+
+  lines = []
+  for key, value in stats.items():
+    lines.append(f"# TYPE philosopher_{name}_{key} gauge")
+    lines.append(f"philosopher_{name}_{key} {value}")
+  return "\n".join(lines) + "\n"
+
+
+def _timed_query(method: typing.Callable) -> typing.Callable:
+  """Wrap a query method of a database connection to record its duration.
+  """
+
+  @wraps(method)
+  async def wrapped(*args, **kwargs):
+    started = time.perf_counter()
+    try:
+      return await method(*args, **kwargs)
+    finally:
+      Metrics().observe_call("db", method.__name__,
+                             time.perf_counter() - started)
+
+  return wrapped
+
+
+def _instrument_queries(connection: typing.Any):
+  """Record the number and duration of queries sent over a connection.
+  """
+
+  for name in _QUERY_METHODS:
+    setattr(connection, name, _timed_query(getattr(connection, name)))
+
+
+def instrument_database(connection: typing.Any):
+  """Record the number and duration of queries sent over a connection.
+
+  Transactions send their queries over a client of their own, created for
+  every transaction, so those clients are instrumented as they are created.
+  """
+
+  _instrument_queries(connection)
+
+  # pylint: disable=protected-access
+  in_transaction = connection._in_transaction
+
+  @wraps(in_transaction)
+  def instrumented_in_transaction():
+    context = in_transaction()
+    _instrument_queries(context.connection)
+    return context
+
+  connection._in_transaction = instrumented_in_transaction
+
+
+class MetricsMiddleware:
+  """Records the latency of every request by route.
+  """
+
+  def __init__(self, app: ASGIApp):
+    self.app = app
+
+  async def __call__(self, scope: Scope, receive: Receive, send: Send):
+    """Code to run when the middleware is called.
+    """
+
+    if scope["type"] != "http":
+      await self.app(scope, receive, send)
+      return
+
+    started = time.perf_counter()
+    status = 500
+
+    async def send_wrapper(message):
+      nonlocal status
+      if message["type"] == "http.response.start":
+        status = message["status"]
+      await send(message)
+
+    try:
+      await self.app(scope, receive, send_wrapper)
+    finally:
+      # Routing stores the matched endpoint in the scope. Requests rejected
+      # before routing, like unauthorized ones, have none.
+      endpoint = scope.get("endpoint")
+      Metrics().observe_request(
+        scope["method"],
+        getattr(endpoint, "__name__", "none"),
+        status,
+        time.perf_counter() - started,
+      )
@@ -0,0 +1,124 @@
+"""Pagination utilities.
+"""
+
+import base64
+import typing
+import binascii
+from datetime import datetime
+
+from tortoise.models import Model
+from tortoise.queryset import QuerySet
+from tortoise.query_utils import Q
+
+
+class InvalidCursorError(Exception):
+  """Error to throw when a pagination cursor can't be decoded.
+  """
+
+
+def _encode(*values: typing.Any) -> str:
+  """Encode values into an opaque cursor.
+  """
+
+  raw = "|".join(map(str, values)).encode("utf-8")
+  return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode(cursor: str) -> typing.List[str]:
+  """Decode an opaque cursor into the values it holds.
+  """
+
+  try:
+    padding = "=" * (-len(cursor) % 4)
+    return base64.urlsafe_b64decode(cursor + padding).decode("utf-8").split("|")
+  except (binascii.Error, UnicodeDecodeError) as error:
+    raise InvalidCursorError from error
+
+
+def encode_cursor(published: datetime, pk: int) -> str:
+  """Encode the position of a row into an opaque cursor.
+  """
+
+  return _encode(published.isoformat(), pk)
+
+
+def decode_cursor(cursor: str) -> typing.Tuple[datetime, int]:
+  """Decode an opaque cursor into the position of a row.
+  """
+
+  try:
+    published, pk = _decode(cursor)
+    return datetime.fromisoformat(published), int(pk)
+  except ValueError as error:
+    raise InvalidCursorError from error
+
+
+def encode_rank_cursor(rank: float, pk: int) -> str:
+  """Encode the position of a ranked row into an opaque cursor.
+  """
+
+  return _encode(repr(rank), pk)
+
+
+def decode_rank_cursor(cursor: str) -> typing.Tuple[float, int]:
+  """Decode an opaque cursor into the position of a ranked row.
+  """
+
+  try:
+    rank, pk = _decode(cursor)
+    return float(rank), int(pk)
+  except ValueError as error:
+    raise InvalidCursorError from error
+
+
+def encode_id_cursor(pk: int) -> str:
+  """Encode the position of a row ordered by ID alone into an opaque cursor.
+  """
+
+  return _encode(pk)
+
+
+def decode_id_cursor(cursor: str) -> int:
+  """Decode an opaque cursor into the position of a row ordered by ID alone.
+  """
+
+  try:
+    (pk,) = _decode(cursor)
+    return int(pk)
+  except ValueError as error:
+    raise InvalidCursorError from error
+
+
+class Page:
+  """A page of rows ordered from newest to oldest.
+
+  Rows are found by their position in the `(published, id)` order instead of
+  an offset, so deep pages cost as much as the first one.
+  """
+
+  def __init__(self, count: int, after: typing.Tuple[datetime, int] = None):
+    self.count = count
+    self.after = after
+
+  async def fetch(
+    self,
+    queryset: QuerySet,
+  ) -> typing.Tuple[typing.List[Model], typing.Union[str, None]]:
+    """Fetch the rows of this page and the cursor of the next page.
+    """
+
+    if self.after:
+      published, pk = self.after
+      queryset = queryset.filter(
+        Q(published__lt=published) | Q(published=published, id__lt=pk))
+
+    # Fetch one extra row to know whether there is a next page.
+    rows = await queryset \
+      .order_by("-published", "-id") \
+      .limit(self.count + 1)
+
+    if len(rows) <= self.count:
+      return rows, None
+
+    last = rows[self.count - 1]
+    return rows[:self.count], encode_cursor(last.published, last.pk)
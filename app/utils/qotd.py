@@ -0,0 +1,211 @@
+"""Quote of the Day utilities.
+
+Submissions and votes of the current day live in Redis only: every day has a
+sorted set of submitted quote IDs scored by their votes, and every user has a
+set of the quotes they voted for that day. Once a day is over, its tallies
+and winner are persisted to the database in one transaction.
+"""
+
+# pylint: disable=attribute-defined-outside-init
+
+import typing
+import asyncio
+from datetime import date, datetime, timedelta
+
+import sentry_sdk
+from tortoise.transactions import in_transaction
+
+from app.utils import config, Singleton
+from app.utils.redis import Redis, acquire_lock, release_lock, run_script
+from app.models import Quote, QuoteOfTheDay, Submission
+
+# Seconds Redis keeps the submissions and votes of a day, enough for the day
+# itself and its rollover.
+_DAY_TTL = 3 * 86400
+
+# Seconds to wait after midnight before rolling over, for votes in flight.
+_ROLLOVER_DELAY = config("QOTD_ROLLOVER_DELAY", cast=int, default=60)
+
+# Seconds a rollover may take before another instance may try it again.
+_ROLLOVER_LOCK_TIMEOUT = 300
+
+# Count a vote unless the quote isn't submitted or the user already voted.
+# Returns the new number of votes, 0 if the user already voted, or -1 if the
+# quote isn't submitted.
+_VOTE_SCRIPT = """
+if not redis.call("ZSCORE", KEYS[1], ARGV[1]) then
+  return -1
+end
+if redis.call("SADD", KEYS[2], ARGV[1]) == 0 then
+  return 0
+end
+redis.call("EXPIRE", KEYS[2], ARGV[2])
+return tonumber(redis.call("ZINCRBY", KEYS[1], 1, ARGV[1]))
+"""
+
+
+class AlreadyVotedError(Exception):
+  """Error to throw when a user votes for the same submission twice a day.
+  """
+
+
+def today() -> date:
+  """Current day, which submissions and votes count towards.
+  """
+
+  return datetime.utcnow().date()
+
+
+def _submissions_key(day: date) -> str:
+  return f"philosopher:qotd:{day.isoformat()}:submissions"
+
+
+def _votes_key(day: date, user_id: str) -> str:
+  return f"philosopher:qotd:{day.isoformat()}:votes:{user_id}"
+
+
+async def submit(quote_id: int) -> bool:
+  """Submit a quote for today, unless it is already submitted.
+  """
+
+  redis = Redis().connection
+  key = _submissions_key(today())
+
+  pipeline = redis.pipeline()
+  pipeline.zadd(key, 0, quote_id, exist=redis.ZSET_IF_NOT_EXIST)
+  pipeline.expire(key, _DAY_TTL)
+  added, _ = await pipeline.execute()
+
+  return bool(added)
+
+
+async def vote(user_id: str, quote_id: int) -> typing.Union[int, None]:
+  """Vote for a submission of today.
+
+  Returns the new number of votes of the submission, or None if the quote
+  isn't submitted today. Costs one Redis round trip and no queries.
+  """
+
+  day = today()
+  votes = await run_script(
+    Redis().connection,
+    _VOTE_SCRIPT,
+    keys=[_submissions_key(day),
+          _votes_key(day, user_id)],
+    args=[quote_id, _DAY_TTL],
+  )
+
+  if votes < 0:
+    return None
+  if votes == 0:
+    raise AlreadyVotedError
+  return votes
+
+
+async def standings(
+  count: int = None,
+  day: date = None,
+) -> typing.List[typing.Tuple[int, int]]:
+  """Quote IDs and votes of the submissions of a day, most voted first.
+  """
+
+  submissions = await Redis().connection.zrevrange(
+    _submissions_key(day or today()),
+    0,
+    count - 1 if count else -1,
+    withscores=True,
+  )
+  return [(int(quote_id), int(votes)) for quote_id, votes in submissions]
+
+
+async def rollover(day: date) -> typing.Union[QuoteOfTheDay, None]:
+  """Persist the tallies and winner of a day that is over.
+
+  Safe to run from every instance of the app: only one of them persists the
+  day, and days that are already persisted are skipped. Returns the winner,
+  or None if there is nothing to persist.
+  """
+
+  redis = Redis().connection
+  lock = f"qotd:rollover:{day.isoformat()}"
+
+  token = await acquire_lock(redis, lock, _ROLLOVER_LOCK_TIMEOUT)
+  if not token:
+    return None
+
+  try:
+    if await QuoteOfTheDay.exists(day=day):
+      return None
+
+    # Skip quotes that were deleted since they were submitted.
+    tallies = await standings(day=day)
+    existing = set(await Quote \
+      .filter(id__in=[quote_id for quote_id, _ in tallies]) \
+      .values_list("id", flat=True))
+    tallies = [
+      (quote_id, votes) for quote_id, votes in tallies if quote_id in existing
+    ]
+    if not tallies:
+      return None
+
+    # Ties go to the oldest quote.
+    winner_id, winner_votes = min(
+      tallies, key=lambda tally: (-tally[1], tally[0]))
+
+    async with in_transaction():
+      await Submission.bulk_create([
+        Submission(day=day, quote_id=quote_id, votes=votes)
+        for quote_id, votes in tallies
+      ])
+      return await QuoteOfTheDay.create(
+        day=day,
+        quote_id=winner_id,
+        votes=winner_votes,
+      )
+  finally:
+    await release_lock(redis, lock, token)
+
+
+class Rollover(Singleton):
+  """Rolls over every day shortly after it ends, for as long as the app runs.
+  """
+
+  def init(self, *args, **kwargs):
+    """Start without a running rollover.
+    """
+
+    self._task: asyncio.Task = None
+
+  async def initialize(self):
+    """Start rolling over days in the background.
+    """
+
+    if not self._task:
+      self._task = asyncio.create_task(self._run())
+
+  async def close(self):
+    """Stop rolling over days.
+    """
+
+    if self._task:
+      self._task.cancel()
+      try:
+        await self._task
+      except asyncio.CancelledError:
+        pass
+      self._task = None
+
+  async def _run(self):
+    """Roll over the previous day, then wait for the next one to end.
+    """
+
+    while True:
+      try:
+        await rollover(today() - timedelta(days=1))
+      except:
+        sentry_sdk.capture_exception()
+
+      now = datetime.utcnow()
+      midnight = datetime.combine(now.date() + timedelta(days=1),
+                                  datetime.min.time())
+      await asyncio.sleep((midnight - now).total_seconds() + _ROLLOVER_DELAY)
@@ -3,9 +3,66 @@
 
 # pylint: disable=attribute-defined-outside-init
 
+import time
+import secrets
+import typing
+import hashlib
+
 import aioredis
 
 from app.utils import Singleton
+from app.utils.metrics import Metrics
+
+# Delete a lock only if it is still held by the token that acquired it.
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+  return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+# Take a token from a bucket that refills continuously up to its capacity.
+# Returns 0 if a token was taken, or the milliseconds until one is available.
+_TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "updated")
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate / 1000)
+local wait = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  wait = math.ceil((1 - tokens) * 1000 / rate)
+end
+redis.call("HMSET", KEYS[1], "tokens", tostring(tokens), "updated", now)
+redis.call("PEXPIRE", KEYS[1], math.ceil(capacity * 1000 / rate))
+return wait
+"""
+
+# SHA1 digests of the Lua scripts run with `run_script`, by script.
+_SCRIPT_DIGESTS: typing.Dict[str, str] = {}
+
+
+class InstrumentedRedis(aioredis.Redis):  # pylint: disable=abstract-method,too-many-ancestors
+  """Redis commands interface that records the duration of every command.
+  """
+
+  def execute(self, command, *args, **kwargs):
+    return self._timed(command, super().execute(command, *args, **kwargs))
+
+  @staticmethod
+  async def _timed(command, result: typing.Awaitable):
+    started = time.perf_counter()
+    try:
+      return await result
+    finally:
+      if isinstance(command, bytes):
+        command = command.decode("utf-8")
+      Metrics().observe_call("redis", command.upper(),
+                             time.perf_counter() - started)
 
 
 class Redis(Singleton):
@@ -28,7 +85,7 @@ class Redis(Singleton):
 
     if not self.connection:
       self.connection: aioredis.Redis = await aioredis.create_redis_pool(
-        url, encoding="utf-8")
+        url, encoding="utf-8", commands_factory=InstrumentedRedis)
 
 
 def use_redis(func):
@@ -43,3 +100,79 @@ def use_redis(func):
     return await func(request, *args, redis=redis.connection, **kwargs)
 
   return inner
+
+
+async def acquire_lock(
+  redis: aioredis.Redis,
+  name: str,
+  timeout: float,
+) -> typing.Union[str, None]:
+  """Try to acquire a lock shared by every instance of the app.
+
+  Returns a token to release the lock with, or None if the lock is already
+  held. The lock expires by itself after the timeout in seconds.
+  """
+
+  token = secrets.token_hex(16)
+  acquired = await redis.set(
+    f"philosopher:lock:{name}",
+    token,
+    pexpire=int(timeout * 1000),
+    exist=redis.SET_IF_NOT_EXIST,
+  )
+  return token if acquired else None
+
+
+async def release_lock(redis: aioredis.Redis, name: str, token: str):
+  """Release a lock acquired with `acquire_lock`.
+  """
+
+  await redis.eval(
+    _RELEASE_LOCK_SCRIPT,
+    keys=[f"philosopher:lock:{name}"],
+    args=[token],
+  )
+
+
+async def run_script(
+  redis: aioredis.Redis,
+  script: str,
+  keys: typing.List[str],
+  args: typing.List,
+) -> typing.Any:
+  """Run a Lua script, sending only its digest once Redis has it loaded.
+  """
+
+  digest = _SCRIPT_DIGESTS.get(script)
+  if digest is None:
+    digest = _SCRIPT_DIGESTS[script] = hashlib.sha1(
+      script.encode("utf-8")).hexdigest()
+
+  try:
+    return await redis.evalsha(digest, keys=keys, args=args)
+  except aioredis.ReplyError as error:
+    if not str(error).startswith("NOSCRIPT"):
+      raise
+    return await redis.eval(script, keys=keys, args=args)
+
+
+async def take_token(
+  redis: aioredis.Redis,
+  name: str,
+  capacity: int,
+  rate: float,
+) -> float:
+  """Take a token from a bucket shared by every instance of the app.
+
+  The bucket holds up to `capacity` tokens and refills at `rate` tokens per
+  second. Returns 0 if a token was taken, or the seconds until one is
+  available.
+  """
+
+  wait = await run_script(
+    redis,
+    _TOKEN_BUCKET_SCRIPT,
+    keys=[f"philosopher:ratelimit:{name}"],
+    args=[capacity, rate, int(time.time() * 1000)],
+  )
+  return wait / 1000
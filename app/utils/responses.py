@@ -0,0 +1,38 @@
+"""Response utilities.
+"""
+
+import typing
+import hashlib
+
+import orjson
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+  """JSON response rendered with orjson.
+
+  Serializes datetimes natively, so models don't need to format them first.
+  """
+
+  def render(self, content: typing.Any) -> bytes:
+    return orjson.dumps(content)
+
+
+def compute_etag(*parts: typing.Any) -> str:
+  """Compute a strong entity tag from the parts that identify a version.
+  """
+
+  raw = "|".join(str(part) for part in parts).encode("utf-8")
+  return f"\"{hashlib.blake2b(raw, digest_size=16).hexdigest()}\""
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+  """Check whether the client already has this version of the resource.
+  """
+
+  header = request.headers.get("If-None-Match")
+  if not header:
+    return False
+  tags = [tag.strip() for tag in header.split(",")]
+  return "*" in tags or etag in tags
@@ -4,6 +4,7 @@
 import typing
 
 from app.models import Author, Meaning, Quote
+from app.utils.friends import are_friends
 
 
 class MissingArgumentsError(Exception):
@@ -42,6 +43,22 @@ def author_of_quote(*_args, **kwargs) -> bool:
   return False
 
 
+async def friend_of_author(*_args, **kwargs) -> bool:
+  """Checks if the user is a friend of the author of the resource.
+  """
+
+  user: Author = kwargs.get("user")
+  resource: typing.Union[Quote, Meaning] = kwargs.get("meaning") \
+                                        or kwargs.get("quote")
+
+  if not user or not resource:
+    raise MissingArgumentsError
+
+  if not resource.author:
+    return False
+  return await are_friends(user.user_id, resource.author)
+
+
 def author_of_meaning(*_args, **kwargs) -> bool:
   """Checks if the user is the author of the meaning.
   """
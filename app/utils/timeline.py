@@ -0,0 +1,88 @@
+"""Timeline utilities.
+
+Every user has a timeline in Redis: a capped list of the IDs of the newest
+quotes from their friends, newest first. New quotes are pushed onto the
+timelines of every friend of their author when they are created. Authors
+with too many friends for that are marked instead, and their friends pull
+their quotes from the database when reading their timelines.
+"""
+
+import typing
+import asyncio
+
+from app.utils import config
+from app.utils.redis import Redis
+from app.utils.friends import count_friends, get_friends, get_friends_in
+from app.models import Quote
+
+# Number of quote IDs kept on every timeline.
+_TIMELINE_SIZE = config("TIMELINE_SIZE", cast=int, default=500)
+
+# Largest number of friends an author's quotes are pushed to.
+_FANOUT_LIMIT = config("TIMELINE_FANOUT_LIMIT", cast=int, default=1000)
+
+# Set of authors whose quotes are pulled instead of pushed.
+_PULLED_KEY = "philosopher:timeline:pulled"
+
+
+def _key(user_id: str) -> str:
+  return f"philosopher:timeline:{user_id}"
+
+
+async def push(quote_id: int, author_id: str):
+  """Push a new quote onto the timelines of every friend of its author.
+  """
+
+  redis = Redis().connection
+  count = await count_friends(author_id)
+
+  if count > _FANOUT_LIMIT:
+    # Friends of the author pull their quotes when reading instead.
+    await redis.sadd(_PULLED_KEY, author_id)
+    return
+
+  if not count:
+    return
+
+  friend_ids = await get_friends(author_id)
+
+  # Push onto every timeline in one round trip.
+  pipeline = redis.pipeline()
+  for friend_id in friend_ids:
+    pipeline.lpush(_key(friend_id), quote_id)
+    pipeline.ltrim(_key(friend_id), 0, _TIMELINE_SIZE - 1)
+  await pipeline.execute()
+
+
+async def read(
+  user_id: str,
+  count: int,
+  before: int = None,
+) -> typing.Tuple[typing.List[int], typing.Set[str]]:
+  """Get the IDs of the newest quotes on a timeline, before a quote ID.
+
+  Gets one more ID than asked for when there are more, to know whether there
+  is a next page. Returns the IDs along with the friend IDs of the user, as
+  timelines may hold quotes of former friends.
+  """
+
+  pushed, friend_ids, pulled_ids = await asyncio.gather(
+    Redis().connection.lrange(_key(user_id), 0, -1),
+    get_friends(user_id),
+    get_friends_in(user_id, _PULLED_KEY),
+  )
+  quote_ids = {int(quote_id) for quote_id in pushed}
+
+  # Pull the quotes of friends with too many friends to push to.
+  if pulled_ids:
+    queryset = Quote.filter(author__in=pulled_ids)
+    if before:
+      queryset = queryset.filter(id__lt=before)
+    quote_ids.update(await queryset \
+      .order_by("-id") \
+      .limit(count + 1) \
+      .values_list("id", flat=True))
+
+  if before:
+    quote_ids = {quote_id for quote_id in quote_ids if quote_id < before}
+  return sorted(quote_ids, reverse=True)[:count + 1], friend_ids
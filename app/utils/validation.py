@@ -0,0 +1,151 @@
+"""Request body validation utilities.
+"""
+
+import typing
+
+from starlette.requests import Request
+from typesystem import Schema, String
+from typesystem.fields import FORMATS
+
+# Bytes a single character may take in JSON, as an escaped surrogate pair.
+_MAX_CHAR_SIZE = 12
+
+# Bytes allowed on top of the fields themselves, for punctuation and spacing.
+_MAX_OVERHEAD = 1024
+
+
+class _FieldError(Exception):
+  """Error to throw when a compiled field rejects a value.
+  """
+
+
+def _compile_string(field: String) -> typing.Callable[[typing.Any], str]:
+  """Compile a string field into a function that validates a value.
+
+  Follows the checks of `String.validate` in the same order, with every
+  option and error text resolved up front.
+  """
+
+  allow_null = field.allow_null
+  allow_blank = field.allow_blank
+  trim_whitespace = field.trim_whitespace
+  min_length = field.min_length
+  max_length = field.max_length
+  pattern = field.pattern_regex
+  errors = {code: field.get_error_text(code) for code in field.errors}
+
+  def validate(value: typing.Any) -> typing.Any:
+    if value is None:
+      if allow_null:
+        return None
+      if allow_blank:
+        return ""
+      raise _FieldError(errors["null"])
+    if not isinstance(value, str):
+      raise _FieldError(errors["type"])
+
+    value = value.replace("\0", "")
+    if trim_whitespace:
+      value = value.strip()
+
+    if not value and not allow_blank:
+      if allow_null:
+        return None
+      raise _FieldError(errors["blank"])
+    if min_length is not None and len(value) < min_length:
+      raise _FieldError(errors["min_length"])
+    if max_length is not None and len(value) > max_length:
+      raise _FieldError(errors["max_length"])
+    if pattern is not None and not pattern.search(value):
+      raise _FieldError(errors["pattern"])
+    return value
+
+  return validate
+
+
+class CompiledSchema:
+  """Validator specialized for a schema of string fields.
+
+  Gives the same results and errors as `schema.validate_or_error`, without
+  building a generic validator on every call. Schemas with other kinds of
+  fields are validated by typesystem instead.
+  """
+
+  def __init__(self, schema: typing.Type[Schema]):
+    self.schema = schema
+    self.fields = None
+    self.max_size = None
+
+    if all(
+        isinstance(field, String) and field.format not in FORMATS
+        for field in schema.fields.values()):
+      self.fields = [(key, field.has_default(), field.get_default_value,
+                      _compile_string(field))
+                     for key, field in schema.fields.items()]
+
+    # Bodies can only be valid up to a size if every string is bounded.
+    if all(
+        isinstance(field, String) and field.max_length is not None
+        for field in schema.fields.values()):
+      self.max_size = _MAX_OVERHEAD + sum(
+        len(key) + field.max_length * _MAX_CHAR_SIZE
+        for key, field in schema.fields.items())
+
+  def validate_or_error(
+    self,
+    value: typing.Any,
+  ) -> typing.Tuple[typing.Union[Schema, None], typing.Union[dict, None]]:
+    """Validate a value into a schema instance, or a dictionary of errors.
+    """
+
+    if self.fields is None:
+      validated, errors = self.schema.validate_or_error(value)
+      return validated, dict(errors) if errors else None
+
+    if value is None:
+      return None, {"": "May not be null."}
+    if not isinstance(value, dict):
+      return None, {"": "Must be an object."}
+
+    validated = {}
+    missing = {}
+    errors = {}
+    for key, has_default, get_default, validate in self.fields:
+      if key not in value:
+        if has_default:
+          validated[key] = get_default()
+        else:
+          missing[key] = "This field is required."
+        continue
+      try:
+        validated[key] = validate(value[key])
+      except _FieldError as error:
+        errors[key] = str(error)
+
+    if missing or errors:
+      return None, {**missing, **errors}
+    return self.schema(validated), None
+
+
+async def read_body(request: Request, limit: int = None) -> bytes:
+  """Read the body of a request, or None if it is larger than `limit` bytes.
+
+  Oversized bodies are rejected by their declared length when possible, and
+  otherwise as soon as enough of them has been received.
+  """
+
+  if limit is None:
+    return await request.body()
+
+  length = request.headers.get("content-length", "")
+  if length.isdigit() and int(length) > limit:
+    return None
+
+  size = 0
+  chunks = []
+  async for chunk in request.stream():
+    size += len(chunk)
+    if size > limit:
+      return None
+    chunks.append(chunk)
+  return b"".join(chunks)
@@ -0,0 +1,30 @@
+"""Benchmarks of the API.
+
+Every benchmark runs offline against in-process stand-ins for Redis, Auth0
+and the database, unless `BENCHMARK_REDIS_URL` and `BENCHMARK_DATABASE_URL`
+point at local services to use instead. Run them all from the project root
+with:
+
+  python -m benchmarks
+"""
+
+import os
+
+from starlette.config import Config
+
+# Configuration the app needs at import time, unless it is already set in the
+# environment or `.env`, which the app may have been imported with.
+_config = Config(".env")
+for _key, _value in {
+    "AUTH0_BASE_URL": "philosopher.test",
+    "AUTH0_CLIENT_ID": "benchmark",
+    "AUTH0_CLIENT_SECRET": "benchmark",
+    "REDIS_URL": "redis://localhost",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_USER": "philosopher",
+    "DB_PASS": "philosopher",
+    "DB_NAME": "philosopher",
+}.items():
+  if _config(_key, default=None) is None:
+    os.environ[_key] = _value
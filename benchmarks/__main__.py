@@ -0,0 +1,71 @@
+"""Run every benchmark and save the results as JSON.
+
+Results are keyed by benchmark and case, in calls or requests per second, so
+higher is better. Compare them with the results of another commit with:
+
+  python -m benchmarks --compare benchmarks/results/<commit>.json
+"""
+
+import asyncio
+import argparse
+import typing
+
+from benchmarks import auth_middleware, feeds, full_stack, serialization
+from benchmarks import tokens
+from benchmarks.harness import compare_results, save_results
+
+# Benchmarks to run, by name.
+_BENCHMARKS = {
+  "tokens": tokens.run,
+  "auth_middleware": auth_middleware.run,
+  "serialization": serialization.run,
+  "feeds": feeds.run,
+  "full_stack": full_stack.run,
+}
+
+
+async def run(names: typing.Iterable[str]) -> typing.Dict[str, float]:
+  """Run the given benchmarks one after the other.
+  """
+
+  results = {}
+  for name in names:
+    for case, value in (await _BENCHMARKS[name]()).items():
+      results[f"{name}.{case}"] = value
+      print(f"{name}.{case}: {value:.1f}/sec", flush=True)
+  return results
+
+
+def main():
+  """Run the benchmarks picked on the command line.
+  """
+
+  parser = argparse.ArgumentParser(prog="python -m benchmarks")
+  parser.add_argument(
+    "names",
+    nargs="*",
+    help=f"benchmarks to run, out of {', '.join(_BENCHMARKS)}",
+  )
+  parser.add_argument(
+    "--output",
+    help="file to save results to, benchmarks/results/<commit>.json by default",
+  )
+  parser.add_argument(
+    "--compare",
+    help="file with previous results to compare against",
+  )
+  args = parser.parse_args()
+  for name in args.names:
+    if name not in _BENCHMARKS:
+      parser.error(f"unknown benchmark: {name}")
+
+  results = asyncio.run(run(args.names or list(_BENCHMARKS)))
+  path = save_results(results, args.output)
+  print(f"saved results to {path}")
+
+  if args.compare:
+    print("\n".join(compare_results(results, args.compare)))
+
+
+if __name__ == "__main__":
+  main()
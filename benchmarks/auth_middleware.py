@@ -0,0 +1,110 @@
+"""Benchmark of the authorization middleware.
+
+Compares requests per second on the `/quotes/{quote_id}` route with the plain
+ASGI `AuthMiddleware` against the same checks run from Starlette's
+`BaseHTTPMiddleware`, which is how the middleware used to be implemented.
+
+Runs offline: a locally generated RS256 key signs the token and is put
+straight into the key store, and the route returns a fixed quote instead of
+querying the database. Run it from the project root with:
+
+  python -m benchmarks.auth_middleware
+"""
+
+import asyncio
+import typing
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.routing import Route
+
+from app.utils.auth import AuthMiddleware, KeyStore, token_cache
+from app.utils.responses import ORJSONResponse
+from benchmarks.harness import measure_async, send_request
+from benchmarks.stubs import SigningKey
+
+_REQUESTS = 5000
+_CONCURRENCY = 50
+
+
+async def get_quote(request: Request) -> ORJSONResponse:
+  """Stand-in for the quote endpoint that doesn't touch the database.
+  """
+
+  return ORJSONResponse(
+    {
+      "message": "Success.",
+      "result": {
+        "id": int(request.path_params["quote_id"]),
+        "body": "The unexamined life is not worth living.",
+        "author": request.state.user["sub"],
+        "published": "2021-05-22T13:55:39",
+      },
+    },
+    status_code=200,
+  )
+
+
+class BaseHTTPAuthMiddleware(BaseHTTPMiddleware):
+  """The authorization checks run the way they used to be.
+  """
+
+  async def dispatch(self, request: Request, call_next: typing.Callable):
+    response = await AuthMiddleware(self.app).authorize(request)
+    if response:
+      return response
+    return await call_next(request)
+
+
+def make_app(middleware_class: type) -> Starlette:
+  """Build an app with only the quote route behind the given middleware.
+  """
+
+  return Starlette(
+    routes=[Route("/quotes/{quote_id}", endpoint=get_quote, methods=["GET"])],
+    middleware=[Middleware(middleware_class)],
+  )
+
+
+async def measure(app: Starlette, token: str) -> float:
+  """Requests per second the app serves with concurrent clients.
+  """
+
+  async def request():
+    assert await send_request(app, "/quotes/1", token=token) == 200
+
+  return await measure_async(request, _REQUESTS, concurrency=_CONCURRENCY)
+
+
+async def run() -> typing.Dict[str, float]:
+  """Measure both middleware implementations.
+  """
+
+  key = SigningKey()
+  KeyStore().keys = {key.kid: key.jwk}
+  token = key.sign("auth0|benchmark")
+  results = {}
+  for name, middleware_class in (
+    ("base_http_middleware", BaseHTTPAuthMiddleware),
+    ("asgi_middleware", AuthMiddleware),
+  ):
+    token_cache.clear()
+    results[name] = await measure(make_app(middleware_class), token)
+  return results
+
+
+def main():
+  """Print requests per second before and after.
+  """
+
+  results = asyncio.run(run())
+  for name, requests_per_second in results.items():
+    print(f"{name}: {requests_per_second:.0f} requests/sec")
+  speedup = results["asgi_middleware"] / results["base_http_middleware"]
+  print(f"speedup: {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,43 @@
+"""Benchmark of paginated author feeds.
+"""
+
+import typing
+
+from app.models import Meaning, Quote
+from app.utils.pagination import Page
+from benchmarks.harness import backends, measure_async, seed
+
+_AUTHOR = "auth0|benchmark"
+_ROWS = 5000
+_PAGE_SIZE = 50
+_FETCHES = 200
+
+
+async def run() -> typing.Dict[str, float]:
+  """Measure fetching the first and a deep page of quotes and meanings.
+  """
+
+  results = {}
+  async with backends():
+    # Rows from other authors make the author filter do some work.
+    await seed("auth0|other", _ROWS)
+    await seed(_AUTHOR, _ROWS, meanings=_ROWS)
+
+    for name, model in (("quotes", Quote), ("meanings", Meaning)):
+      queryset = model.filter(author=_AUTHOR)
+
+      # The position ten pages before the oldest row.
+      deep = await queryset \
+        .order_by("published", "id") \
+        .offset(_PAGE_SIZE * 10) \
+        .first()
+      first_page = Page(_PAGE_SIZE)
+      deep_page = Page(_PAGE_SIZE, after=(deep.published, deep.id))
+
+      results[f"{name}_first_page"] = await measure_async(
+        lambda page=first_page, queryset=queryset: page.fetch(queryset),
+        _FETCHES)
+      results[f"{name}_deep_page"] = await measure_async(
+        lambda page=deep_page, queryset=queryset: page.fetch(queryset),
+        _FETCHES)
+  return results
@@ -0,0 +1,52 @@
+"""Benchmark of requests through the whole app.
+
+Requests go through every middleware, routing and the endpoints, which talk
+to the Redis and database stand-ins and to the stubbed Auth0 for profiles.
+"""
+
+import typing
+
+from app import app
+from benchmarks.harness import backends, measure_async, send_request, seed
+
+_USER = {
+  "user_id": "auth0|benchmark",
+  "username": "benchmark",
+  "picture": "https://picture.test/benchmark.png",
+}
+_QUOTES = 1000
+_REQUESTS = 500
+_CONCURRENCY = 10
+
+# Benchmarked requests by name, as paths and query strings.
+_REQUESTS_BY_NAME = {
+  "get_quote": ("/quotes/1", b""),
+  "get_quotes":
+    ("/quotes", ("ids=" + ",".join(map(str, range(1, 51)))).encode()),
+  "get_meaning": ("/meanings/1", b""),
+  "get_meanings_of_quote": ("/quotes/1/meanings", b"count=50"),
+  "get_author": ("/authors/benchmark", b""),
+  "get_quotes_from_author": ("/authors/benchmark/quotes", b"count=50"),
+  "get_meanings_from_author": ("/authors/benchmark/meanings", b"count=50"),
+}
+
+
+async def run() -> typing.Dict[str, float]:
+  """Measure requests per second of the main read endpoints.
+  """
+
+  results = {}
+  async with backends(users=[_USER]) as key:
+    await seed(_USER["user_id"], _QUOTES, meanings=_QUOTES)
+    token = key.sign(_USER["user_id"])
+
+    for name, (path, query_string) in _REQUESTS_BY_NAME.items():
+
+      async def request(path=path, query_string=query_string):
+        status = await send_request(
+          app, path, query_string=query_string, token=token)
+        assert status == 200, (path, status)
+
+      results[name] = await measure_async(
+        request, _REQUESTS, concurrency=_CONCURRENCY)
+  return results
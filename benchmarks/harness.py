@@ -0,0 +1,244 @@
+"""Helpers to set up, run and record benchmarks.
+"""
+
+import os
+import time
+import asyncio
+import platform
+import subprocess
+import contextlib
+import typing
+
+import orjson
+from tortoise import Tortoise
+from starlette.types import ASGIApp
+
+from app.caches import quote_cache
+from app.models import Meaning, Quote
+from app.utils.auth import KeyStore, token_cache
+from app.utils.http import HTTP
+from app.utils.redis import Redis
+from benchmarks.stubs import MemoryRedis, SigningKey, StubAuth0Session
+
+# Times every measurement is repeated, keeping the fastest.
+_REPEATS = 5
+
+# Results slower than this ratio of the previous ones are reported.
+_REGRESSION_RATIO = 0.9
+
+
+def measure(func: typing.Callable[[], typing.Any], number: int) -> float:
+  """Calls per second of a function.
+  """
+
+  func()
+  best = float("inf")
+  for _ in range(_REPEATS):
+    started = time.perf_counter()
+    for _ in range(number):
+      func()
+    best = min(best, time.perf_counter() - started)
+  return number / best
+
+
+async def measure_async(
+  func: typing.Callable[[], typing.Awaitable],
+  number: int,
+  concurrency: int = 1,
+) -> float:
+  """Calls per second of a coroutine function, with concurrent callers.
+  """
+
+  await func()
+  best = float("inf")
+  for _ in range(_REPEATS):
+    started = time.perf_counter()
+    for _ in range(number // concurrency):
+      await asyncio.gather(*[func() for _ in range(concurrency)])
+    best = min(best, time.perf_counter() - started)
+  return number // concurrency * concurrency / best
+
+
+async def send_request(
+  app: ASGIApp,
+  path: str,
+  method: str = "GET",
+  query_string: bytes = b"",
+  token: str = None,
+) -> int:
+  """Send one request straight to an app and return the response status.
+  """
+
+  headers = []
+  if token:
+    headers.append((b"authorization", f"Bearer {token}".encode("ascii")))
+  scope = {
+    "type": "http",
+    "asgi": {
+      "version": "3.0"
+    },
+    "http_version": "1.1",
+    "method": method,
+    "scheme": "http",
+    "path": path,
+    "raw_path": path.encode("utf-8"),
+    "query_string": query_string,
+    "root_path": "",
+    "headers": headers,
+    "client": ("127.0.0.1", 50000),
+    "server": ("testserver", 80),
+  }
+  status = None
+  received = False
+  disconnected = asyncio.Event()
+
+  async def receive():
+    nonlocal received
+    if received:
+      # Like a real server, only report a disconnect once the client leaves.
+      await disconnected.wait()
+      return {"type": "http.disconnect"}
+    received = True
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+  async def send(message):
+    nonlocal status
+    if message["type"] == "http.response.start":
+      status = message["status"]
+
+  await app(scope, receive, send)
+  disconnected.set()
+  return status
+
+
+@contextlib.asynccontextmanager
+async def backends(
+  users: typing.Iterable[dict] = (),
+  database_url: str = None,
+) -> typing.AsyncIterator[SigningKey]:
+  """Set up Redis, Auth0 and the database for the app, and tear them down.
+
+  Auth0 is always stubbed, knowing the given users and a fresh signing key.
+  Redis and the database are kept in memory unless `BENCHMARK_REDIS_URL` and
+  `BENCHMARK_DATABASE_URL`, or `database_url`, point at scratch services to
+  use instead.
+  """
+
+  key = SigningKey()
+  redis = Redis()
+  redis_url = os.environ.get("BENCHMARK_REDIS_URL")
+  if redis_url:
+    await redis.initialize(url=redis_url)
+  else:
+    redis.connection = MemoryRedis()
+  HTTP().session = StubAuth0Session({"keys": [key.jwk]}, users)
+  await KeyStore().load(from_cache=False)
+  await Tortoise.init(
+    db_url=database_url or
+    os.environ.get("BENCHMARK_DATABASE_URL", "sqlite://:memory:"),
+    modules={"models": ["app.models"]},
+  )
+  await Tortoise.generate_schemas(safe=True)
+
+  try:
+    yield key
+  finally:
+    await Tortoise.close_connections()
+    if redis_url:
+      redis.connection.close()
+      await redis.connection.wait_closed()
+    redis.connection = None
+    HTTP().session = None
+    KeyStore().keys = {}
+    token_cache.clear()
+    quote_cache.local.clear()
+
+
+def _commit() -> typing.Union[str, None]:
+  """Commit hash of the code being benchmarked, if it can be found.
+  """
+
+  try:
+    return subprocess.run(
+      ["git", "rev-parse", "--short", "HEAD"],
+      capture_output=True,
+      check=True,
+      text=True,
+    ).stdout.strip()
+  except (OSError, subprocess.CalledProcessError):
+    return None
+
+
+def save_results(
+  results: typing.Dict[str, float],
+  path: str = None,
+) -> str:
+  """Save results as JSON, along with what they were measured on.
+
+  Results are saved under the commit they were measured on by default.
+  """
+
+  commit = _commit()
+  if not path:
+    path = os.path.join("benchmarks", "results", f"{commit or 'unknown'}.json")
+  report = {
+    "commit": commit,
+    "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    "python": platform.python_version(),
+    "machine": platform.machine(),
+    "results": results,
+  }
+  directory = os.path.dirname(path)
+  if directory:
+    os.makedirs(directory, exist_ok=True)
+  with open(path, "wb") as file:
+    file.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+  return path
+
+
+def compare_results(
+  results: typing.Dict[str, float],
+  path: str,
+) -> typing.List[str]:
+  """Compare results against previously saved ones, line by line.
+  """
+
+  with open(path, "rb") as file:
+    previous = orjson.loads(file.read())
+
+  lines = [f"compared to {previous.get('commit') or path}:"]
+  for name, value in results.items():
+    before = previous["results"].get(name)
+    if not before:
+      lines.append(f"  {name}: new")
+      continue
+    ratio = value / before
+    flag = "  REGRESSION" if ratio < _REGRESSION_RATIO else ""
+    lines.append(f"  {name}: {ratio:.2f}x{flag}")
+  return lines
+
+
+async def seed(
+  author_id: str,
+  quotes: int,
+  meanings: int = 0,
+) -> typing.List[Quote]:
+  """Create quotes from an author, and their meanings on the first ones.
+  """
+
+  await Quote.bulk_create([
+    Quote(
+      body=f"Quote number {number} of the benchmark.",
+      author=author_id,
+      meaning_count=int(number < meanings),
+    ) for number in range(quotes)
+  ])
+  created = await Quote.filter(author=author_id).order_by("id")
+  await Meaning.bulk_create([
+    Meaning(
+      body=f"Meaning of quote number {quote.id} of the benchmark.",
+      author=author_id,
+      quote_id=quote.id,
+    ) for quote in created[:meanings]
+  ])
+  return created
@@ -0,0 +1,49 @@
+"""Benchmark of serializing models into response bodies.
+"""
+
+import typing
+from datetime import datetime
+
+from app.models import Author, Meaning, Quote
+from app.utils.responses import ORJSONResponse
+from benchmarks.harness import backends, measure
+
+_CALLS = 20000
+_PAGE_SIZE = 50
+
+
+async def run() -> typing.Dict[str, float]:
+  """Measure serializing single models and a full page of quotes.
+  """
+
+  results = {}
+  async with backends():
+    published = datetime(2021, 5, 22, 13, 55, 39)
+    author = Author("auth0|benchmark", "benchmark", "https://picture.test/")
+    quote = Quote(
+      id=1,
+      body="The unexamined life is not worth living.",
+      author=author.user_id,
+      published=published,
+    )
+    meaning = Meaning(
+      id=1,
+      body="Think about why you do what you do, or you are just drifting.",
+      author=author.user_id,
+      quote_id=quote.id,
+      published=published,
+    )
+    page = [quote] * _PAGE_SIZE
+
+    results["author"] = measure(author.to_dict, _CALLS)
+    results["quote"] = measure(quote.to_dict, _CALLS)
+    results["meaning"] = measure(meaning.to_dict, _CALLS)
+    results["quote_page"] = measure(
+      lambda: ORJSONResponse({
+        "message": "Success.",
+        "result": [quote.to_dict() for quote in page],
+        "next": None,
+      }),
+      _CALLS // _PAGE_SIZE,
+    )
+  return results
@@ -0,0 +1,469 @@
+"""In-process stand-ins for the services the app depends on.
+"""
+
+import re
+import math
+import time
+import base64
+import typing
+from urllib.parse import parse_qsl, urlsplit
+
+import rsa
+import aioredis
+from jose import jwt
+
+from app.utils import config, counters, friends, qotd, redis as redis_utils
+
+# Sign tokens for whichever tenant and audience the app is configured with.
+_AUTH0_BASE_URL = config("AUTH0_BASE_URL")
+_AUDIENCE = config("AUTH0_AUTH_AUDIENCE", default="philosopher")
+
+
+def _b64(number: int) -> str:
+  """Encode an integer as unpadded URL-safe base64.
+  """
+
+  raw = number.to_bytes((number.bit_length() + 7) // 8, "big")
+  return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+class SigningKey:
+  """Locally generated RS256 key to sign tokens the way Auth0 does.
+  """
+
+  def __init__(self, kid: str = "benchmark"):
+    public_key, private_key = rsa.newkeys(2048)
+    self.kid = kid
+    self.jwk = {
+      "kty": "RSA",
+      "kid": kid,
+      "use": "sig",
+      "n": _b64(public_key.n),
+      "e": _b64(public_key.e),
+    }
+    self._pem = private_key.save_pkcs1().decode("ascii")
+
+  def sign(self, sub: str, expires_in: int = 3600) -> str:
+    """Sign an access token for a user, valid for `expires_in` seconds.
+    """
+
+    return jwt.encode(
+      {
+        "sub": sub,
+        "aud": _AUDIENCE,
+        "iss": f"https://{_AUTH0_BASE_URL}/",
+        "exp": int(time.time()) + expires_in,
+      },
+      self._pem,
+      algorithm="RS256",
+      headers={"kid": self.kid},
+    )
+
+
+class MemoryRedis:  # pylint: disable=too-many-public-methods
+  """Stand-in for the Redis commands the app uses, kept in memory.
+  """
+
+  SET_IF_NOT_EXIST = "SET_IF_NOT_EXIST"
+  ZSET_IF_NOT_EXIST = "ZSET_IF_NOT_EXIST"
+
+  def __init__(self):
+    self._values: typing.Dict[str, typing.Any] = {}
+    self._expires: typing.Dict[str, float] = {}
+
+  def _get(self, key: str) -> typing.Any:
+    expires_at = self._expires.get(key)
+    if expires_at is not None and expires_at <= time.time():
+      self._values.pop(key, None)
+      self._expires.pop(key, None)
+    return self._values.get(key)
+
+  async def get(self, key: str) -> typing.Union[str, None]:
+    """Get the value of a key.
+    """
+
+    value = self._get(key)
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+  async def mget(self, key: str, *keys: str) -> typing.List:
+    """Get the values of many keys.
+    """
+
+    return [await self.get(key) for key in (key, *keys)]
+
+  async def set(
+    self,
+    key: str,
+    value: typing.Any,
+    expire: float = 0,
+    pexpire: float = 0,
+    exist: str = None,
+  ) -> bool:
+    """Set the value of a key, optionally only if it doesn't exist yet.
+    """
+
+    if exist == self.SET_IF_NOT_EXIST and self._get(key) is not None:
+      return False
+    self._values[key] = value
+    self._expires.pop(key, None)
+    if expire or pexpire:
+      self._expires[key] = time.time() + (expire or pexpire / 1000)
+    return True
+
+  async def delete(self, key: str, *keys: str) -> int:
+    """Delete keys.
+    """
+
+    deleted = 0
+    for name in (key, *keys):
+      deleted += self._values.pop(name, None) is not None
+      self._expires.pop(name, None)
+    return deleted
+
+  async def incr(self, key: str) -> int:
+    """Increment the integer value of a key.
+    """
+
+    self._values[key] = str(int(self._get(key) or 0) + 1)
+    return int(self._values[key])
+
+  async def expire(self, key: str, timeout: float) -> bool:
+    """Expire a key after a number of seconds.
+    """
+
+    if self._get(key) is None:
+      return False
+    self._expires[key] = time.time() + timeout
+    return True
+
+  async def hgetall(self, key: str) -> dict:
+    """Get every field of a hash.
+    """
+
+    return dict(self._get(key) or {})
+
+  async def hget(self, key: str, field: str) -> typing.Union[str, None]:
+    """Get a field of a hash.
+    """
+
+    return (self._get(key) or {}).get(field)
+
+  async def hmget(self, key: str, field: str, *fields: str) -> typing.List:
+    """Get many fields of a hash.
+    """
+
+    return [await self.hget(key, name) for name in (field, *fields)]
+
+  async def hsetnx(self, key: str, field: str, value: typing.Any) -> int:
+    """Set a field of a hash, unless it is already set.
+    """
+
+    hash_ = self._values.setdefault(key, {})
+    if field in hash_:
+      return 0
+    hash_[field] = str(value)
+    return 1
+
+  async def hmset_dict(self, key: str, *args, **kwargs) -> bool:
+    """Set many fields of a hash.
+    """
+
+    fields = dict(*args, **kwargs)
+    hash_ = self._values.setdefault(key, {})
+    hash_.update({name: str(value) for name, value in fields.items()})
+    return True
+
+  async def sadd(self, key: str, member: typing.Any, *members) -> int:
+    """Add members to a set.
+    """
+
+    set_ = self._values.setdefault(key, set())
+    size = len(set_)
+    set_.update(str(name) for name in (member, *members))
+    return len(set_) - size
+
+  async def srem(self, key: str, member: typing.Any, *members) -> int:
+    """Remove members from a set.
+    """
+
+    set_ = self._get(key) or set()
+    size = len(set_)
+    set_.difference_update(str(name) for name in (member, *members))
+    return size - len(set_)
+
+  async def smembers(self, key: str) -> typing.List[str]:
+    """Get every member of a set.
+    """
+
+    return list(self._get(key) or ())
+
+  async def scard(self, key: str) -> int:
+    """Count the members of a set.
+    """
+
+    return len(self._get(key) or ())
+
+  async def sinter(self, key: str, *keys: str) -> typing.List[str]:
+    """Get the members every set has.
+    """
+
+    return list(
+      set(self._get(key) or
+          ()).intersection(*[self._get(name) or () for name in keys]))
+
+  async def sismember(self, key: str, member: typing.Any) -> int:
+    """Check whether a set has a member.
+    """
+
+    return int(str(member) in (self._get(key) or ()))
+
+  async def lpush(self, key: str, value: typing.Any, *values) -> int:
+    """Prepend values to a list.
+    """
+
+    list_ = self._values.setdefault(key, [])
+    list_[:0] = [str(item) for item in reversed((value, *values))]
+    return len(list_)
+
+  async def ltrim(self, key: str, start: int, stop: int) -> bool:
+    """Keep only a range of a list.
+    """
+
+    list_ = self._get(key)
+    if list_ is not None:
+      list_[:] = list_[start:stop + 1 if stop != -1 else None]
+    return True
+
+  async def lrange(self, key: str, start: int, stop: int) -> typing.List[str]:
+    """Get a range of a list.
+    """
+
+    return list(self._get(key) or [])[start:stop + 1 if stop != -1 else None]
+
+  async def zadd(
+    self,
+    key: str,
+    score: float,
+    member: typing.Any,
+    *pairs,
+    exist: str = None,
+  ) -> int:
+    """Add members to a sorted set, or update their scores.
+    """
+
+    zset = self._values.setdefault(key, {})
+    size = len(zset)
+    pairs = (score, member, *pairs)
+    for score_, member_ in zip(pairs[::2], pairs[1::2]):
+      if exist == self.ZSET_IF_NOT_EXIST and str(member_) in zset:
+        continue
+      zset[str(member_)] = float(score_)
+    return len(zset) - size
+
+  async def zrevrange(
+    self,
+    key: str,
+    start: int,
+    stop: int,
+    withscores: bool = False,
+  ) -> typing.List:
+    """Get a range of a sorted set, highest scores first.
+    """
+
+    members = sorted(
+      (self._get(key) or {}).items(),
+      key=lambda item: (item[1], item[0]),
+      reverse=True)[start:stop + 1 if stop != -1 else None]
+    if withscores:
+      return members
+    return [member for member, _ in members]
+
+  async def evalsha(self, _digest: str, **_kwargs):
+    """Fail like Redis does for scripts it doesn't have loaded yet.
+    """
+
+    raise aioredis.ReplyError("NOSCRIPT No matching script.")
+
+  async def eval(
+    self,
+    script: str,
+    keys: typing.List[str] = None,
+    args: typing.List = None,
+  ) -> typing.Any:
+    """Run one of the app's Lua scripts, emulated in Python.
+    """
+
+    # pylint: disable=protected-access
+    scripts = {
+      counters._INCREMENT_SCRIPT: self._increment_count,
+      counters._FILL_SCRIPT: self._fill_count,
+      redis_utils._TOKEN_BUCKET_SCRIPT: self._take_token,
+      redis_utils._RELEASE_LOCK_SCRIPT: self._release_lock,
+      qotd._VOTE_SCRIPT: self._vote,
+      friends._STORE_SCRIPT: self._store_friends,
+    }
+    return scripts[script](*keys, *args)
+
+  def _store_friends(self, key: str, version_key: str, version: str,
+                     *members: str) -> int:
+    if (self._get(version_key) or "") != version:
+      return 0
+    self._values[key] = set(members)
+    self._expires.pop(key, None)
+    return 1
+
+  def _release_lock(self, key: str, token: str) -> int:
+    if self._get(key) != token:
+      return 0
+    self._values.pop(key)
+    self._expires.pop(key, None)
+    return 1
+
+  def _vote(self, submissions_key: str, votes_key: str, quote_id: int,
+            ttl: int) -> int:
+    submissions = self._get(submissions_key) or {}
+    if str(quote_id) not in submissions:
+      return -1
+    votes = self._values.setdefault(votes_key, set())
+    if str(quote_id) in votes:
+      return 0
+    votes.add(str(quote_id))
+    self._expires[votes_key] = time.time() + ttl
+    submissions[str(quote_id)] += 1
+    return int(submissions[str(quote_id)])
+
+  def _take_token(self, key: str, capacity: int, rate: float, now: int) -> int:
+    bucket = self._get(key) or {}
+    tokens = float(bucket.get("tokens", capacity))
+    updated = float(bucket.get("updated", now))
+    tokens = min(capacity, tokens + max(0, now - updated) * rate / 1000)
+    wait = 0
+    if tokens >= 1:
+      tokens -= 1
+    else:
+      wait = math.ceil((1 - tokens) * 1000 / rate)
+    self._values[key] = {"tokens": str(tokens), "updated": str(now)}
+    self._expires[key] = time.time() + math.ceil(capacity * 1000 / rate) / 1000
+    return wait
+
+  def _increment_count(self, key: str, author_id: str, amount: int,
+                       token: str) -> typing.Union[int, None]:
+    hash_ = self._values.setdefault(key, {})
+    if author_id not in hash_:
+      hash_[f"{author_id}:changed"] = token
+      return None
+    hash_[author_id] = str(int(hash_[author_id]) + int(amount))
+    return int(hash_[author_id])
+
+  def _fill_count(self, key: str, author_id: str, count: int,
+                  token: str) -> int:
+    hash_ = self._values.setdefault(key, {})
+    if hash_.get(f"{author_id}:changed", "") != token:
+      return 0
+    hash_.setdefault(author_id, str(count))
+    hash_.pop(f"{author_id}:changed", None)
+    return 1
+
+  def pipeline(self) -> "MemoryPipeline":
+    """Queue commands to run together.
+    """
+
+    return MemoryPipeline(self)
+
+
+class MemoryPipeline:
+  """Stand-in for a Redis pipeline of `MemoryRedis` commands.
+  """
+
+  def __init__(self, redis: MemoryRedis):
+    self._redis = redis
+    self._commands: typing.List[typing.Tuple[str, tuple, dict]] = []
+
+  def __getattr__(self, name: str) -> typing.Callable:
+
+    def queue(*args, **kwargs):
+      self._commands.append((name, args, kwargs))
+
+    return queue
+
+  async def execute(self) -> typing.List:
+    """Run every queued command in order.
+    """
+
+    commands, self._commands = self._commands, []
+    return [
+      await getattr(self._redis, name)(*args, **kwargs)
+      for name, args, kwargs in commands
+    ]
+
+
+class _StubResponse:
+  """Stand-in for an aiohttp response with a JSON body.
+  """
+
+  def __init__(self, data: typing.Any, status: int = 200):
+    self.status = status
+    self._data = data
+
+  async def json(self) -> typing.Any:
+    """Get the JSON body.
+    """
+
+    return self._data
+
+  async def __aenter__(self) -> "_StubResponse":
+    return self
+
+  async def __aexit__(self, *_args):
+    pass
+
+
+class StubAuth0Session:
+  """Stand-in for the HTTP session, answering like Auth0 would.
+
+  Serves the JSON Web Key Set, management tokens and user lookups from
+  memory, so the code paths that call Auth0 can run offline.
+  """
+
+  connector = None
+
+  def __init__(self, jwks: dict, users: typing.Iterable[dict]):
+    self.jwks = jwks
+    self.users = {user["user_id"]: user for user in users}
+    self.searches = 0
+    self.search_status = 200
+    self.lookup_status = 200
+
+  def get(self, url: str, params: dict = None, **_kwargs) -> _StubResponse:
+    """Answer a GET request to Auth0.
+    """
+
+    parsed = urlsplit(url)
+    query = dict(parse_qsl(parsed.query), **(params or {}))
+    if parsed.path == "/.well-known/jwks.json":
+      return _StubResponse(self.jwks)
+    if parsed.path == "/api/v2/users":
+      self.searches += 1
+      if self.search_status != 200:
+        return _StubResponse({"error": "Error"}, status=self.search_status)
+      return _StubResponse(self._search(query["q"]))
+    user = self.users.get(parsed.path.rsplit("/", 1)[-1])
+    if self.lookup_status != 200:
+      return _StubResponse({"error": "Error"}, status=self.lookup_status)
+    if user is None:
+      return _StubResponse({"error": "Not Found"}, status=404)
+    return _StubResponse(user)
+
+  def post(self, _url: str, **_kwargs) -> _StubResponse:
+    """Answer a request for a management token.
+    """
+
+    return _StubResponse({"access_token": "benchmark", "expires_in": 86400})
+
+  def _search(self, query: str) -> typing.List[dict]:
+    """Find users by a `field:"value"` or `field:("a" OR "b")` query.
+    """
+
+    field = query.split(":", 1)[0]
+    values = set(re.findall(r'"([^"]+)"', query))
+    return [user for user in self.users.values() if user[field] in values]
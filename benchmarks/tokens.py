@@ -0,0 +1,47 @@
+"""Benchmark of verifying access tokens.
+
+Measures requests per second through `AuthMiddleware` when every token has to
+have its RS256 signature verified, and when the verified claims are already
+cached. The signing key is served by the stubbed Auth0 JWKS endpoint and
+loaded into the key store the way it is when the app starts.
+"""
+
+import typing
+
+from starlette.types import Receive, Scope, Send
+
+from app.utils.auth import AuthMiddleware, KeyStore, token_cache
+from benchmarks.harness import backends, measure_async, send_request
+
+_REQUESTS = 1000
+
+
+async def no_content(_scope: Scope, _receive: Receive, send: Send):
+  """App that answers every request with an empty response.
+  """
+
+  await send({"type": "http.response.start", "status": 204, "headers": []})
+  await send({"type": "http.response.body", "body": b""})
+
+
+async def run() -> typing.Dict[str, float]:
+  """Measure verifying tokens with and without the cache.
+  """
+
+  results = {}
+  async with backends() as key:
+    app = AuthMiddleware(no_content)
+    token = key.sign("auth0|benchmark")
+
+    async def verify():
+      token_cache.clear()
+      assert await send_request(app, "/", token=token) == 204
+
+    async def cached():
+      assert await send_request(app, "/", token=token) == 204
+
+    results["verify"] = await measure_async(verify, _REQUESTS)
+    results["cached"] = await measure_async(cached, _REQUESTS)
+    results["load_keys"] = await measure_async(
+      lambda: KeyStore().load(from_cache=True), _REQUESTS)
+  return results